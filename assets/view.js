@@ -0,0 +1,581 @@
+// 页面只加载一次；Python 端每次分析完调用 showParse(doc, first, marks, comparison) 推送结果
+// first 是第一句的句号(浏览树库时按树库里的句号显示)，检索结果不连续时是每句句号的数组，
+// 对比模式下是每句的标签("HanLP · #1")
+// marks[s] 是第 s 句里需要高亮的弧(依存词编号)：检索命中的，或对比模式下两个内核有分歧的
+// comparison 是对比模式的一致率摘要，其余时候为 null
+// 每句: [词, 词性, 中心词, 关系, 出度]
+let doc = [];
+let sigs = [];
+let firstIndex = 1;
+let marks = [];
+const list = document.getElementById('sentence-list');
+const summary = document.getElementById('doc-summary');
+const statsCard = document.getElementById('stats-card');
+const latencyPanel = document.getElementById('latency-panel');
+const compareSummary = document.getElementById('compare-summary');
+const SVG_NS = "http://www.w3.org/2000/svg";
+
+// 句子卡片先用估算高度占位，滚动到附近才真正生成词块和 SVG，离开视野后释放
+const observer = new IntersectionObserver(entries => {
+    entries.forEach(e => {
+        if (e.isIntersecting) { if (!e.target._st || e.target.dataset.dirty) renderSentence(e.target); }
+        else if (e.target._st) releaseSentence(e.target);
+    });
+}, { rootMargin: '1200px 0px' });
+
+function esc(s) { return String(s).replace(/[&<>"]/g, c => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}[c])); }
+
+function sentenceWords(s) {
+    const [texts, pos, heads, rels, outDeg, dist] = doc[s];
+    return texts.map((t, i) => ({ id: i + 1, text: t, pos: pos[i], head: heads[i], rel: rels[i], out_degree: outDeg[i], dist: dist[i] }));
+}
+
+function estimateHeight(sent) { return (560 + sent[0].length * 48) + 'px'; }
+
+// 与上一次结果逐句比对，只重画内容变了的句子；返回同步部分的耗时(毫秒)
+function showParse(next, first = 1, nextMarks = null, comparison = null) {
+    const t0 = performance.now();
+    showView('doc-view');
+    const number = s => Array.isArray(first) ? first[s] : first + s;
+    const nextSigs = next.map((sent, s) => JSON.stringify([sent, number(s), nextMarks ? nextMarks[s] : null]));
+    const multiChanged = (doc.length > 1) !== (next.length > 1);
+    const prevLen = doc.length;
+    doc = next;
+    firstIndex = first;
+    marks = nextMarks || [];
+    for (let s = 0; s < next.length; s++) {
+        let el = list.children[s];
+        if (!el) {
+            el = document.createElement('div'); el.className = 'sentence'; el.dataset.s = s;
+            el.style.minHeight = estimateHeight(next[s]);
+            list.appendChild(el); observer.observe(el);
+        } else if (sigs[s] !== nextSigs[s] || multiChanged) {
+            el.dataset.dirty = '1';
+            if (el._st) renderSentence(el); else el.style.minHeight = estimateHeight(next[s]);
+        }
+    }
+    for (let s = prevLen - 1; s >= next.length; s--) {
+        const el = list.children[s]; observer.unobserve(el); el.remove();
+    }
+    sigs = nextSigs;
+    renderComparison(comparison);
+    renderSummary();
+    return performance.now() - t0;
+}
+
+// 全文摘要只累加每句预先算好的指标，不建 DOM
+function renderSummary() {
+    summary.hidden = doc.length < 2;
+    statsCard.hidden = summary.hidden && latencyPanel.hidden && compareSummary.hidden;
+    if (summary.hidden) return;
+    let tokens = 0, tdd = 0, n = 0;
+    doc.forEach(sent => { const m = sent[6]; tokens += m.length; tdd += m.tdd; n += m.relations; });
+    summary.innerHTML = `共 <b>${doc.length}</b> 句 · <b>${tokens}</b> 词 · 全文 MDD <b>${n ? (tdd / n).toFixed(2) : "0.00"}</b>`;
+}
+
+// 对比模式：每对内核一行一致率，下面列出分歧最多的关系和标签混淆
+function renderComparison(c) {
+    compareSummary.hidden = !c;
+    if (!c) return;
+    const pct = v => (v * 100).toFixed(1) + '%';
+    const name = b => c.names[b] || b;
+    const ms = Object.keys(c.seconds).map(b => `${esc(name(b))} ${(c.seconds[b] * 1000).toFixed(0)} ms`).join(' / ');
+    compareSummary.innerHTML = c.pairs.map(p => {
+        const rels = p.relations.filter(r => r[2] + r[3] > 0).slice(0, 8);
+        const conf = p.confusion.slice(0, 8).map(([a, b, n]) => `${esc(a)} → ${esc(b)} ×${n}`).join(' · ');
+        return `<div class="compare-head">${esc(name(p.a))} vs ${esc(name(p.b))} · UAS <b>${pct(p.uas)}</b> · ` +
+               `LAS <b>${pct(p.las)}</b> · 分词 F1 <b>${pct(p.token_f1)}</b> · ` +
+               `对齐 ${p.aligned} / ${p.tokens[0]} · ${p.tokens[1]} 词</div>` +
+            (rels.length ? `<div class="table-wrapper"><table>
+                <thead><tr><th>关系 (${esc(name(p.a))})</th><th>对齐</th><th>中心词不同</th><th>关系不同</th></tr></thead>
+                <tbody>${rels.map(r => `<tr><td>${esc(r[0])}</td><td class="num">${r[1]}</td>` +
+                    `<td class="num">${r[2]}</td><td class="num">${r[3]}</td></tr>`).join('')}</tbody>
+            </table></div>` : '') +
+            (conf ? `<div class="compare-confusion">标签混淆: ${conf}</div>` : '');
+    }).join('') + `<div class="compare-time">各内核耗时: ${ms}</div>`;
+}
+
+// 最近一次分析的分阶段耗时 + 滚动分位数；{event: {stages, total_ms, ...}, rolling: {阶段: {p50, p95, count}}}
+function updateLatency(info) {
+    const ev = info.event, rolling = info.rolling;
+    const names = Object.keys(ev.stages);
+    const known = names.reduce((a, k) => a + ev.stages[k], 0);
+    const rows = names.map(k => [k, ev.stages[k]]);
+    // 线程调度、信号投递等没有单独计时的部分
+    rows.push(['其他', Math.max(0, ev.total_ms - known)]);
+    rows.push(['total', ev.total_ms]);
+    const fmt = v => v == null ? '-' : (v >= 100 ? v.toFixed(0) : v.toFixed(1)) + ' ms';
+    document.getElementById('latency-total').textContent =
+        fmt(ev.total_ms) + (ev.cache_hit ? ' (缓存)' : '') + (ev.error ? ' · 失败' : '');
+    document.getElementById('latency-body').innerHTML = rows.map(([name, ms]) => {
+        const r = rolling[name] || {};
+        const width = ev.total_ms > 0 && name !== 'total' ? Math.round(120 * ms / ev.total_ms) : 0;
+        return `<tr><td>${esc(name)}</td><td class="num">${fmt(ms)}</td>` +
+               `<td>${width ? `<div class="latency-bar" style="width:${width}px"></div>` : ''}</td>` +
+               `<td class="num">${fmt(r.p50)}</td><td class="num">${fmt(r.p95)}</td><td class="num">${r.count || ''}</td></tr>`;
+    }).join('');
+    latencyPanel.hidden = false;
+    statsCard.hidden = false;
+    if (!doc.length) showView('doc-view');
+}
+
+// 欢迎页 / 分析结果 / 语料统计 三个视图同时只显示一个
+function showView(id) {
+    ['welcome', 'doc-view', 'corpus-view'].forEach(v => { document.getElementById(v).hidden = v !== id; });
+}
+
+// ---------- 语料统计 ----------
+// 大文件分析过程中 Python 端定期推送累计统计(corpus_stats.CorpusStats.report)，图表原地更新
+function showCorpusStats(r) {
+    showView('corpus-view');
+    const pct = r.progress != null ? ` · ${(r.progress * 100).toFixed(0)}%` : '';
+    const m = r.sentence_mdd;
+    document.getElementById('corpus-head').innerHTML =
+        `<div class="corpus-title">${esc(r.source || '语料')}<span>${r.done ? '已完成' : (r.cancelled ? '已取消' : '分析中') + pct}</span></div>` +
+        `<div class="corpus-kpis">` +
+        [['句子', r.sentences], ['词', r.tokens], ['全语料 MDD', r.mdd.toFixed(3)],
+         ['句均 MDD', `${m.mean.toFixed(2)} ± ${m.std.toFixed(2)}`], ['MDD p50 / p90', `${m.p50} / ${m.p90}`],
+         ['失败', r.errors]].map(([k, v]) => `<div><b>${v}</b><span>${k}</span></div>`).join('') + `</div>`;
+    const maxLen = r.max_length;
+    vbars('chart-length', r.by_length.map(b => b[2]),
+          r.by_length.map(b => (b[0] >= maxLen ? `${maxLen}+` : b[0])),
+          r.by_length.map(b => `句长 ${b[0] >= maxLen ? maxLen + '+' : b[0]}: ${b[1]} 句 · MDD ${b[2]} · 树深 ${b[3]} · 交叉弧 ${b[4]}`));
+    vbars('chart-degree', r.degree_hist, r.degree_hist.map((_, i) => (i === r.degree_hist.length - 1 ? `${i}+` : i)));
+    vbars('chart-distance', r.distance_hist.slice(1),
+          r.distance_hist.slice(1).map((_, i) => (i === r.distance_hist.length - 2 ? `${i + 1}+` : i + 1)));
+    vbars('chart-mdd', r.mdd_hist, r.mdd_hist.map((_, i) => (i * r.mdd_bin).toFixed(1)));
+    hbars('chart-rel', r.rel, r.rel_total);
+    hbars('chart-pos', r.pos, r.pos_total);
+}
+
+// 竖直柱状图：柱子按下标复用，数据增长时只改属性
+function vbars(id, values, labels, titles) {
+    const svg = document.getElementById(id);
+    const W = svg.clientWidth || 600, H = svg.clientHeight || 200, pad = 22;
+    const n = values.length, max = Math.max(1e-9, ...values);
+    const bw = (W - 8) / Math.max(1, n);
+    const every = Math.max(1, Math.ceil(n / Math.floor(W / 36)));
+    let bars = svg._bars || (svg._bars = []);
+    while (bars.length < n) {
+        const g = document.createElementNS(SVG_NS, 'g');
+        const rect = document.createElementNS(SVG_NS, 'rect'); rect.setAttribute('class', 'bar');
+        const title = document.createElementNS(SVG_NS, 'title'); rect.appendChild(title);
+        const label = document.createElementNS(SVG_NS, 'text'); label.setAttribute('class', 'axis');
+        g.appendChild(rect); g.appendChild(label); svg.appendChild(g);
+        bars.push({ g, rect, title, label });
+    }
+    while (bars.length > n) bars.pop().g.remove();
+    values.forEach((v, i) => {
+        const b = bars[i], h = (H - pad - 6) * v / max, x = 4 + i * bw;
+        b.rect.setAttribute('x', x + 1); b.rect.setAttribute('width', Math.max(1, bw - 2));
+        b.rect.setAttribute('y', H - pad - h); b.rect.setAttribute('height', h);
+        b.title.textContent = titles ? titles[i] : `${labels[i]}: ${v}`;
+        b.label.setAttribute('x', x + bw / 2); b.label.setAttribute('y', H - 6);
+        b.label.textContent = i % every === 0 ? labels[i] : '';
+    });
+}
+
+// 水平条形图：频次 + 占比
+function hbars(id, items, total) {
+    const el = document.getElementById(id);
+    const max = items.length ? items[0][1] : 1;
+    while (el.children.length < items.length) {
+        const row = document.createElement('div'); row.className = 'hbar';
+        row.innerHTML = '<span class="hbar-label"></span><div class="hbar-track"><div class="hbar-fill"></div></div><span class="hbar-val"></span>';
+        el.appendChild(row);
+    }
+    while (el.children.length > items.length) el.lastChild.remove();
+    items.forEach(([label, n], i) => {
+        const row = el.children[i];
+        row.children[0].textContent = label;
+        row.children[1].firstChild.style.width = (100 * n / max).toFixed(1) + '%';
+        row.children[2].textContent = `${n} · ${(100 * n / Math.max(1, total)).toFixed(1)}%`;
+    });
+}
+
+function releaseSentence(el) {
+    el.style.minHeight = el.offsetHeight + 'px';
+    el.innerHTML = ''; el._st = null; delete el.dataset.dirty;
+}
+
+// ---------- 弧线布局引擎 ----------
+// 词宽按文字实测，弧的堆叠层级一次算好；横向滚动时只画可见窗口内的词和弧，
+// 超长句子改用一块视口大小的 2D canvas 绘制
+const LAYOUT = { pad: 60, gap: 24, minWord: 50, level: 28, maxHeight: 1400, wordRow: 70, overscan: 400, canvasMin: 400 };
+const measureCtx = document.createElement('canvas').getContext('2d');
+
+function measureWords(data) {
+    measureCtx.font = "700 24px 'Noto Serif SC', serif";
+    const tw = data.map(w => measureCtx.measureText(w.text).width);
+    measureCtx.font = "600 12px 'Inter', sans-serif";
+    return data.map((w, i) => {
+        const pos = String(w.pos).toUpperCase();
+        return Math.max(LAYOUT.minWord, tw[i], measureCtx.measureText(pos).width + pos.length * 0.5 + 22);
+    });
+}
+
+function computeLayout(data, viewW) {
+    const n = data.length;
+    const widths = measureWords(data);
+    const natural = 2 * LAYOUT.pad + widths.reduce((a, b) => a + b, 0) + LAYOUT.gap * Math.max(0, n - 1);
+    // 放得下时像原来的 space-between 一样铺满整行，放不下就横向滚动
+    const gap = LAYOUT.gap + (natural < viewW && n > 1 ? (viewW - natural) / (n - 1) : 0);
+    const xs = new Float64Array(n + 1);
+    let x = n === 1 ? (viewW - widths[0]) / 2 : LAYOUT.pad;
+    widths.forEach((w, i) => { xs[i + 1] = x + w / 2; x += w + gap; });
+
+    // 按跨度从短到长排：每条弧的层级 = 它覆盖的词间空隙里已有的最高层 + 1
+    const levels = new Int32Array(n + 1);
+    const cover = new Int32Array(n + 1);
+    const order = data.filter(w => w.head > 0 && w.head <= n).sort((a, b) => Math.abs(a.head - a.id) - Math.abs(b.head - b.id));
+    let maxLevel = 0;
+    order.forEach(w => {
+        const l = Math.min(w.id, w.head), r = Math.max(w.id, w.head);
+        let lv = 0;
+        for (let p = l; p < r; p++) if (cover[p] > lv) lv = cover[p];
+        lv += 1; levels[w.id] = lv; if (lv > maxLevel) maxLevel = lv;
+        for (let p = l; p < r; p++) cover[p] = lv;
+    });
+
+    // 嵌套很深时压缩层间距，避免画布高度失控
+    const step = Math.max(6, Math.min(LAYOUT.level, LAYOUT.maxHeight / Math.max(1, maxLevel)));
+    const arcH = lv => 20 + lv * step;
+    const y0 = 30 + arcH(maxLevel + 1) * 1.1;
+    const arcs = data.map(w => {
+        const x = xs[w.id];
+        if (w.head === 0 || w.head > n) {
+            const top = y0 - arcH(maxLevel) - 10;
+            return { dep: w.id, head: 0, l: x, r: x, d: `M${x},${y0} V${top}`, lx: x, ly: top - 10, txt: 'ROOT' };
+        }
+        const hx = xs[w.head], h = arcH(levels[w.id]), cpY = y0 - h * 1.3;
+        return { dep: w.id, head: w.head, l: Math.min(x, hx), r: Math.max(x, hx),
+                 d: `M${hx},${y0} C${hx},${cpY} ${x},${cpY} ${x},${y0}`, lx: (hx + x) / 2, ly: y0 - h * 1.05, txt: w.rel };
+    });
+    return { n, xs, widths, arcs, y0, height: y0 + LAYOUT.wordRow - 10, width: Math.max(viewW, x - gap + LAYOUT.pad) };
+}
+
+function buildSentence(el, s) {
+    el.innerHTML = `
+        <div class="card" style="padding-bottom: 0;">
+            <div class="sent-index"></div>
+            <div class="viz-wrapper"><div class="viz-track"><div class="words-row"></div></div></div>
+        </div>
+        <div class="card"><div class="stats-section">
+            <div class="dashboard-grid">
+                <div class="kpi-card"><span class="kpi-val"></span><span class="kpi-label">Total Distance (TDD)</span></div>
+                <div class="kpi-card"><span class="kpi-val"></span><span class="kpi-label">Relations (n)</span></div>
+                <div class="kpi-card"><span class="kpi-val" style="color:#2563eb"></span><span class="kpi-label">Mean Distance (MDD)</span></div>
+                <div class="kpi-card"><span class="kpi-val"></span><span class="kpi-label">Tree Depth</span></div>
+                <div class="kpi-card"><span class="kpi-val"></span><span class="kpi-label">Crossing Arcs</span></div>
+                <div class="kpi-card"><span class="kpi-val"></span><span class="kpi-label">Head-Initial / Final</span></div>
+            </div>
+            <div class="table-wrapper" style="margin-top: 24px;">
+                <table>
+                    <thead><tr><th>Word</th><th>Pos Tag</th><th>Relation</th><th>Head</th><th>Distance</th><th>Out-Degree</th></tr></thead>
+                    <tbody></tbody>
+                </table>
+            </div>
+        </div></div>`;
+    const track = el.querySelector('.viz-track');
+    const svg = document.createElementNS(SVG_NS, "svg");
+    const defs = document.createElementNS(SVG_NS, "defs");
+    const marker = document.createElementNS(SVG_NS, "marker");
+    marker.setAttribute("id", `arrow-${s}`); marker.setAttribute("markerWidth", "10"); marker.setAttribute("markerHeight", "10");
+    marker.setAttribute("refX", "8"); marker.setAttribute("refY", "3"); marker.setAttribute("orient", "auto");
+    const mPath = document.createElementNS(SVG_NS, "path");
+    mPath.setAttribute("d", "M0,0 L0,6 L9,3 z"); mPath.setAttribute("fill", "#9ca3af");
+    marker.appendChild(mPath); defs.appendChild(marker); svg.appendChild(defs);
+    track.appendChild(svg);
+    const st = {
+        index: el.querySelector('.sent-index'), scroller: el.querySelector('.viz-wrapper'), track, svg,
+        wordsRow: el.querySelector('.words-row'), wordEls: [], arcs: new Map(), canvas: null,
+        kpis: el.querySelectorAll('.kpi-val'), tbody: el.querySelector('tbody'), rows: [],
+        data: null, layout: null, heads: null, deps: null, lit: [], hl: null, marks: new Set(),
+        layoutToken: 0, paintQueued: false,
+    };
+    st.scroller.addEventListener('scroll', () => schedulePaint(el, st), { passive: true });
+    st.scroller.addEventListener('mousemove', e => { if (st.canvas) canvasHover(el, st, e); });
+    st.scroller.addEventListener('mouseleave', () => { if (st.canvas) clearH(el); });
+    return st;
+}
+
+function renderSentence(el) {
+    const s = +el.dataset.s;
+    const data = sentenceWords(s);
+    if (!el._st) el._st = buildSentence(el, s);
+    delete el.dataset.dirty;
+    el.style.minHeight = '';
+    const st = el._st;
+    st.index.hidden = doc.length < 2 && firstIndex === 1;
+    const label = Array.isArray(firstIndex) ? firstIndex[s] : firstIndex + s;
+    st.index.textContent = st.index.hidden ? '' : (typeof label === 'string' ? label : `#${label}`);
+    clearH(el);
+    st.data = data;
+    st.marks = new Set(marks[s] || []);
+    indexSentence(st, data);
+    layoutSentence(el, st);
+
+    renderDashboard(st, data, doc[s][6]);
+}
+
+// 等字体就绪后再量字宽(取代固定的 setTimeout 100ms)
+function layoutSentence(el, st) {
+    const token = ++st.layoutToken;
+    document.fonts.ready.then(() => {
+        if (el._st !== st || st.layoutToken !== token) return;
+        const L = st.layout = computeLayout(st.data, st.scroller.clientWidth);
+        st.track.style.width = L.width + 'px';
+        st.track.style.height = L.height + 'px';
+        const useCanvas = L.n >= LAYOUT.canvasMin;
+        if (useCanvas && !st.canvas) {
+            unmountAll(st);
+            st.canvas = document.createElement('canvas'); st.canvas.className = 'viz-canvas';
+            st.track.insertBefore(st.canvas, st.track.firstChild);
+        } else if (!useCanvas && st.canvas) {
+            st.canvas.remove(); st.canvas = null;
+        }
+        st.svg.style.display = useCanvas ? 'none' : '';
+        st.wordsRow.style.display = useCanvas ? 'none' : '';
+        schedulePaint(el, st);
+    });
+}
+
+function schedulePaint(el, st) {
+    if (st.paintQueued || !st.layout) return;
+    st.paintQueued = true;
+    requestAnimationFrame(() => {
+        st.paintQueued = false;
+        if (el._st !== st) return;
+        if (st.canvas) paintCanvas(st); else paintDom(el, st);
+    });
+}
+
+function visibleRange(st) {
+    const left = st.scroller.scrollLeft, w = st.scroller.clientWidth;
+    return [left - LAYOUT.overscan, left + w + LAYOUT.overscan];
+}
+
+function unmountAll(st) {
+    st.wordEls.forEach(b => b && b.remove()); st.wordEls = [];
+    st.arcs.forEach(arc => { arc.path.remove(); arc.label.remove(); }); st.arcs.clear();
+}
+
+// DOM 模式：只保留窗口内的词块和弧，已挂载的节点按需更新属性
+function paintDom(el, st) {
+    const L = st.layout, data = st.data, s = +el.dataset.s;
+    const [lo, hi] = visibleRange(st);
+    for (let i = 0; i < Math.max(L.n, st.wordEls.length); i++) {
+        let b = st.wordEls[i];
+        const w = data[i];
+        if (!w || L.xs[i + 1] + L.widths[i] / 2 < lo || L.xs[i + 1] - L.widths[i] / 2 > hi) {
+            if (b) { b.remove(); st.wordEls[i] = undefined; }
+            continue;
+        }
+        if (!b) {
+            b = document.createElement('div'); b.className = 'word-block';
+            b.innerHTML = `<div class="word-text"></div><div class="word-pos"></div>`;
+            b.onmouseenter = () => highlight(el, i + 1); b.onmouseleave = () => clearH(el);
+            st.wordsRow.appendChild(b); st.wordEls[i] = b;
+        }
+        const left = (L.xs[i + 1] - L.widths[i] / 2) + 'px', width = L.widths[i] + 'px';
+        if (b.style.left !== left) b.style.left = left;
+        if (b.style.width !== width) b.style.width = width;
+        if (b.dataset.text !== w.text) { b.firstChild.textContent = w.text; b.dataset.text = w.text; }
+        if (b.dataset.pos !== w.pos) { b.lastChild.textContent = w.pos; b.dataset.pos = w.pos; }
+        b.classList.toggle('match', st.marks.has(i + 1));
+    }
+    st.wordEls.length = L.n;
+
+    const mounted = new Set();
+    L.arcs.forEach(a => {
+        if (a.r < lo || a.l > hi) return;
+        mounted.add(a.dep);
+        let arc = st.arcs.get(a.dep);
+        if (!arc) {
+            arc = { path: document.createElementNS(SVG_NS, "path"), label: document.createElementNS(SVG_NS, "text") };
+            arc.label.setAttribute("class", 'dep-label');
+            arc.path.onmouseenter = () => highlightArc(el, a.dep);
+            arc.label.onmouseenter = () => { if (arc.head !== 0) highlightArc(el, a.dep); };
+            arc.path.onmouseleave = arc.label.onmouseleave = () => clearH(el);
+            st.svg.appendChild(arc.path); st.svg.appendChild(arc.label);
+            st.arcs.set(a.dep, arc);
+        }
+        if (arc.d !== a.d) { arc.path.setAttribute("d", a.d); arc.d = a.d; }
+        const match = st.marks.has(a.dep);
+        if (arc.head !== a.head || arc.match !== match) {
+            arc.head = a.head; arc.match = match;
+            const cls = (a.head === 0 ? 'root-arc' : '') + (match ? ' match' : '');
+            if (cls) arc.path.setAttribute("class", cls.trim()); else arc.path.removeAttribute("class");
+            if (a.head === 0) arc.path.removeAttribute("marker-end");
+            else arc.path.setAttribute("marker-end", `url(#arrow-${s})`);
+            arc.label.setAttribute("class", match ? 'dep-label match' : 'dep-label');
+        }
+        if (arc.lx !== a.lx || arc.ly !== a.ly) { arc.label.setAttribute("x", a.lx); arc.label.setAttribute("y", a.ly); arc.lx = a.lx; arc.ly = a.ly; }
+        if (arc.txt !== a.txt) { arc.label.textContent = a.txt; arc.txt = a.txt; }
+    });
+    st.arcs.forEach((arc, dep) => { if (!mounted.has(dep)) { arc.path.remove(); arc.label.remove(); st.arcs.delete(dep); } });
+}
+
+// Canvas 模式：画布只有视口大小，贴在滚动区域左侧，每帧按 scrollLeft 平移重画可见部分
+function paintCanvas(st) {
+    const L = st.layout, data = st.data, canvas = st.canvas;
+    const left = st.scroller.scrollLeft, w = st.scroller.clientWidth, dpr = window.devicePixelRatio || 1;
+    if (canvas.width !== Math.round(w * dpr) || canvas.height !== Math.round(L.height * dpr)) {
+        canvas.width = Math.round(w * dpr); canvas.height = Math.round(L.height * dpr);
+        canvas.style.width = w + 'px'; canvas.style.height = L.height + 'px';
+    }
+    const ctx = canvas.getContext('2d');
+    ctx.setTransform(dpr, 0, 0, dpr, -left * dpr, 0);
+    ctx.clearRect(left, 0, w, L.height);
+    const lo = left - 20, hi = left + w + 20, hl = st.hl;
+
+    ctx.lineCap = 'round'; ctx.lineJoin = 'round';
+    L.arcs.forEach(a => {
+        if (a.r < lo || a.l > hi) return;
+        const on = !hl || hl.arcs.has(a.dep), match = st.marks.has(a.dep);
+        ctx.globalAlpha = on ? 1 : 0.2;
+        ctx.strokeStyle = hl && on ? '#2563eb' : match ? '#f59e0b' : (a.head === 0 ? '#d1d5db' : '#9ca3af');
+        ctx.lineWidth = (hl && on) || match ? 2.5 : 1.5;
+        ctx.setLineDash(a.head === 0 ? [4, 4] : []);
+        ctx.stroke(new Path2D(a.d));
+        ctx.setLineDash([]);
+        if (a.head !== 0) {
+            const x = L.xs[a.dep], y = L.y0;
+            ctx.fillStyle = ctx.strokeStyle;
+            ctx.beginPath(); ctx.moveTo(x - 4, y - 8); ctx.lineTo(x + 4, y - 8); ctx.lineTo(x, y); ctx.closePath(); ctx.fill();
+        }
+        ctx.font = `${(hl && on) || match ? 700 : 600} 13px 'Inter', sans-serif`;
+        ctx.textAlign = 'center'; ctx.textBaseline = 'alphabetic';
+        ctx.lineWidth = 6; ctx.strokeStyle = '#ffffff'; ctx.strokeText(a.txt, a.lx, a.ly);
+        ctx.fillStyle = hl && on ? '#2563eb' : match ? '#b45309' : '#4b5563'; ctx.fillText(a.txt, a.lx, a.ly);
+    });
+
+    const top = L.height - LAYOUT.wordRow;
+    for (let i = 0; i < L.n; i++) {
+        const x = L.xs[i + 1], half = L.widths[i] / 2;
+        if (x + half < lo || x - half > hi) continue;
+        const on = !hl || hl.words.has(i + 1);
+        ctx.globalAlpha = on ? 1 : 0.2;
+        ctx.textAlign = 'center';
+        ctx.font = "700 24px 'Noto Serif SC', serif";
+        ctx.fillStyle = hl && on ? '#2563eb' : '#111827';
+        ctx.fillText(data[i].text, x, top + 28);
+        const pos = String(data[i].pos).toUpperCase();
+        ctx.font = "600 12px 'Inter', sans-serif";
+        const pw = ctx.measureText(pos).width + 20;
+        ctx.fillStyle = hl && on ? '#dbeafe' : '#f3f4f6';
+        ctx.beginPath();
+        if (ctx.roundRect) ctx.roundRect(x - pw / 2, top + 40, pw, 22, 11); else ctx.rect(x - pw / 2, top + 40, pw, 22);
+        ctx.fill();
+        ctx.fillStyle = hl && on ? '#1e40af' : '#4b5563';
+        ctx.fillText(pos, x, top + 55);
+    }
+    ctx.globalAlpha = 1;
+}
+
+// Canvas 模式的命中测试：词行按 x 二分查找，弧按标签位置查找
+function canvasHover(el, st, e) {
+    const L = st.layout; if (!L) return;
+    const r = st.track.getBoundingClientRect();
+    const x = e.clientX - r.left, y = e.clientY - r.top;
+    if (y >= L.height - LAYOUT.wordRow) {
+        let lo = 1, hi = L.n;
+        while (lo < hi) { const mid = (lo + hi) >> 1; if (L.xs[mid] < x) lo = mid + 1; else hi = mid; }
+        const near = [lo - 1, lo].filter(i => i >= 1 && i <= L.n && Math.abs(L.xs[i] - x) <= L.widths[i - 1] / 2);
+        if (near.length) { if (st.hoverKey !== 'w' + near[0]) { st.hoverKey = 'w' + near[0]; highlight(el, near[0]); } return; }
+    } else {
+        const a = L.arcs.find(a => a.head !== 0 && Math.abs(a.lx - x) < a.txt.length * 4 + 8 && Math.abs(a.ly - 4 - y) < 10);
+        if (a) { if (st.hoverKey !== 'a' + a.dep) { st.hoverKey = 'a' + a.dep; highlightArc(el, a.dep); } return; }
+    }
+    if (st.hoverKey) clearH(el);
+}
+
+// 表格行按位置复用，只改动内容变了的单元格
+function renderDashboard(st, data, m) {
+    const pct = v => Math.round(v * 100) + '%';
+    const kpis = [m.tdd, m.relations, m.mdd.toFixed(2), m.tree_depth, m.crossings,
+                  m.relations ? `${pct(m.head_initial)} / ${pct(m.head_final)}` : '-'];
+    kpis.forEach((v, i) => { if (st.kpis[i].textContent !== String(v)) st.kpis[i].textContent = v; });
+
+    data.forEach((w, i) => {
+        // 中心词越界(CoNLL-U 或内核输出有误)时和弧线一样当作没有弧，只显示原始编号
+        const valid = w.head > 0 && w.head <= data.length;
+        const hTxt = valid ? data[w.head - 1].text : (w.head === 0 ? "ROOT" : `${w.head} (越界)`);
+        const dist = valid ? w.dist : "-";
+        const cells = [w.text, w.pos, w.rel, hTxt, dist, w.out_degree].map(String);
+        let row = st.rows[i];
+        if (!row) {
+            const tr = document.createElement('tr');
+            tr.innerHTML = `<td style="font-weight:600; color:#111827;"></td><td><span class="pos-tag"></span></td><td></td><td></td><td></td><td></td>`;
+            const targets = Array.from(tr.children); targets[1] = targets[1].firstChild;
+            row = { tr, targets, cells: [] };
+            st.tbody.appendChild(tr); st.rows.push(row);
+        }
+        cells.forEach((c, k) => { if (row.cells[k] !== c) { row.targets[k].textContent = c; row.cells[k] = c; } });
+    });
+    while (st.rows.length > data.length) st.rows.pop().tr.remove();
+}
+
+// 每句预先建好 中心词 / 依存词 邻接索引；悬停时只碰相关的几个节点，不再扫整页
+function indexSentence(st, data) {
+    const n = data.length;
+    st.heads = new Int32Array(n + 1);
+    st.deps = Array.from({ length: n + 1 }, () => []);
+    data.forEach(w => {
+        st.heads[w.id] = w.head;
+        if (w.head > 0 && w.head <= n) st.deps[w.head].push(w.id);
+    });
+}
+function light(st, node) { node.classList.add('highlighted'); st.lit.push(node); }
+function mark(st, id) {
+    if (st.canvas) { st.hl.words.add(id); return; }
+    const b = st.wordEls[id - 1]; if (b) { light(st, b); light(st, b.lastChild); }
+}
+// 高亮 dep 指向其中心词的那条弧(含两端的词)
+function markArc(st, dep) {
+    if (st.canvas) st.hl.arcs.add(dep);
+    else {
+        const arc = st.arcs.get(dep);
+        if (arc) { light(st, arc.path); light(st, arc.label); }
+    }
+    if (st.heads[dep] !== 0) mark(st, st.heads[dep]);
+    mark(st, dep);
+}
+function beginHover(el, st) {
+    clearH(el); el.classList.add('hover-mode');
+    if (st.canvas) st.hl = { words: new Set(), arcs: new Set() };
+}
+function highlight(el, id) {
+    const st = el._st; if (!st) return;
+    beginHover(el, st);
+    markArc(st, id);
+    st.deps[id].forEach(d => markArc(st, d));
+    if (st.canvas) schedulePaint(el, st);
+}
+function highlightArc(el, dep) {
+    const st = el._st; if (!st) return;
+    beginHover(el, st);
+    markArc(st, dep);
+    if (st.canvas) schedulePaint(el, st);
+}
+// 只撤销上次点亮的节点
+function clearH(el) {
+    const st = el._st;
+    el.classList.remove('hover-mode');
+    if (!st) return;
+    st.lit.forEach(node => node.classList.remove('highlighted'));
+    st.lit.length = 0;
+    st.hoverKey = null;
+    if (st.hl) { st.hl = null; schedulePaint(el, st); }
+}
+
+// 视口宽度变化时重新排版已渲染的句子
+let resizeQueued = false;
+window.addEventListener('resize', () => {
+    if (resizeQueued) return;
+    resizeQueued = true;
+    requestAnimationFrame(() => {
+        resizeQueued = false;
+        Array.from(list.children).forEach(el => { if (el._st && el._st.data) layoutSentence(el, el._st); });
+    });
+});
@@ -0,0 +1,323 @@
+import sys
+import json
+import argparse
+import multiprocessing as mp
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import pipelines
+import metrics
+from parsing import HANLP_KEY, hanlp_auth, parse_text, parse_many
+from hanlp_client import LatencyStats
+from conllu import format_sentence
+from columnar import ColumnarWriter
+from corpus_stats import CorpusStats
+from progress import Progress
+from compare import DISPLAY_NAMES, Agreement, backends_of
+
+# ================= 命令行批处理 (不加载 Qt) =================
+# 用法: python batch.py corpus.txt -m stanza -f conllu -o out.conllu -j 8
+# 每行一个句子；结果按输入顺序流式写出，内存占用只和在途分片数有关。
+# -m hanlp,stanza 为对比模式：每个分片同时交给各内核，逐行输出各自的结果和一致率，最后汇总。
+
+_backend = None
+_hanlp_key = None
+_with_metrics = False
+_with_stats = False
+
+
+def _init_worker(backend, hanlp_key, threads, hanlp_options, with_metrics, with_stats=False):
+    # 每个工作进程只加载一次模型
+    global _backend, _hanlp_key, _with_metrics, _with_stats
+    _backend, _hanlp_key, _with_metrics, _with_stats = backend, hanlp_key, with_metrics, with_stats
+    pipelines.manager.configure('hanlp', **hanlp_options)
+    # 对比模式下 backend 是元组，每个内核都加载
+    backends = backend if isinstance(backend, tuple) else (backend,)
+    if 'stanza' in backends:
+        if threads:
+            try:
+                import torch
+                torch.set_num_threads(threads)
+            except ImportError:
+                pass
+        pipelines.manager.get('stanza')
+    if 'hanlp' in backends:
+        pipelines.manager.get('hanlp', auth=hanlp_auth(hanlp_key))
+
+
+def _attach_metrics(results):
+    # 整个分片的所有句子拼在一起批量算指标
+    sentences = [data for _, _, parsed, _ in results if parsed for data in parsed]
+    result = metrics.compute(sentences)
+    k = 0
+    attached = []
+    for lineno, text, parsed, err in results:
+        summaries = None
+        if parsed:
+            summaries = [metrics.sentence_summary(result, k + i) for i in range(len(parsed))]
+            k += len(parsed)
+        attached.append((lineno, text, parsed, err, summaries))
+    return attached
+
+
+def _parse_hanlp_batch(texts):
+    try:
+        return [(sentences, None) for sentences in parse_many(texts, 'hanlp', _hanlp_key)]
+    except Exception:
+        if len(texts) == 1:
+            raise
+    # 一批失败不连累同批的其它行：逐行重试，只有自己也失败的行记为失败
+    parsed = []
+    for text in texts:
+        try:
+            parsed.append((parse_many([text], 'hanlp', _hanlp_key)[0], None))
+        except Exception as e:
+            parsed.append((None, str(e)))
+    return parsed
+
+
+def _parse_lines(backend, chunk):
+    # 返回与 chunk 一一对应的 (句子列表, 错误)，以及这期间 HanLP 成功请求的耗时和被限流的次数
+    if backend == 'hanlp':
+        # 分片按 batch_size 切成几批并发发送，每批一个请求
+        client = pipelines.manager.get('hanlp', auth=hanlp_auth(_hanlp_key))
+        texts = [text for _, text in chunk]
+        size = client.batch_size
+        batches = [texts[i:i + size] for i in range(0, len(texts), size)]
+
+        def run(batch):
+            try:
+                return _parse_hanlp_batch(batch)
+            except Exception as e:
+                return [(None, str(e))] * len(batch)
+
+        with ThreadPoolExecutor(max_workers=client.max_in_flight) as pool:
+            parsed = [item for part in pool.map(run, batches) for item in part]
+        return parsed, client.latency.drain(), client.drain_throttled()
+    parsed = []
+    for _, text in chunk:
+        try:
+            parsed.append((parse_text(text, backend, _hanlp_key), None))
+        except Exception as e:
+            parsed.append((None, str(e)))
+    return parsed, [], 0
+
+
+def _compare_chunk(chunk):
+    # 各内核在各自的线程里同时处理整个分片；每行与第一个内核比较，一致率计数随结果一起返回
+    with ThreadPoolExecutor(max_workers=len(_backend)) as pool:
+        outputs = list(pool.map(lambda backend: _parse_lines(backend, chunk), _backend))
+    latencies = [seconds for _, lat, _ in outputs for seconds in lat]
+    throttled = sum(n for _, _, n in outputs)
+    agreement = Agreement()
+    results = []
+    for i, (lineno, text) in enumerate(chunk):
+        lines = [parsed[i] for parsed, _, _ in outputs]
+        errors = [f"{backend}: {err}" for backend, (_, err) in zip(_backend, lines) if err is not None]
+        if errors:
+            results.append((lineno, text, None, "; ".join(errors), None))
+            continue
+        parses = {backend: sentences for backend, (sentences, _) in zip(_backend, lines)}
+        line = Agreement()
+        for other in _backend[1:]:
+            line.add(text, parses[_backend[0]], parses[other])
+        agreement.merge(line)
+        results.append((lineno, text, parses, None, line.report(top=5)))
+    return results, latencies, throttled, agreement
+
+
+def _parse_chunk(chunk):
+    if isinstance(_backend, tuple):
+        return _compare_chunk(chunk)
+    parsed, latencies, throttled = _parse_lines(_backend, chunk)
+    results = [(lineno, text, sentences, err) for (lineno, text), (sentences, err) in zip(chunk, parsed)]
+    stats = None
+    if _with_stats:
+        # 分片内先统计，主进程只做合并
+        stats = CorpusStats().update([data for _, _, parsed, _ in results if parsed for data in parsed])
+        stats.errors = sum(err is not None for _, _, _, err in results)
+    if _with_metrics:
+        return _attach_metrics(results), latencies, throttled, stats
+    return [r + (None,) for r in results], latencies, throttled, stats
+
+
+def read_chunks(stream, size):
+    chunk = []
+    for lineno, line in enumerate(stream, 1):
+        text = line.strip()
+        if not text:
+            continue
+        chunk.append((lineno, text))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def write_compare(out, fmt, lineno, text, parses, err, agreement):
+    # 对比模式：parses 是 {内核: 句子列表}，agreement 是这一行的一致率
+    if fmt == 'jsonl':
+        row = {"line": lineno, "text": text}
+        if err is not None:
+            row["error"] = err
+        else:
+            row["parses"] = parses
+            row["agreement"] = agreement
+        out.write(json.dumps(row, ensure_ascii=False) + "\n")
+    elif err is not None:
+        out.write(f"# sent_id = {lineno}\n# text = {text}\n# error = {err}\n\n")
+    else:
+        summary = f"uas={agreement['uas']} las={agreement['las']} token_f1={agreement['token_f1']}"
+        for backend, sentences in parses.items():
+            for k, data in enumerate(sentences):
+                out.write(format_sentence(data, sent_id=f"{lineno}-{k + 1}-{backend}",
+                                          text="".join(w['text'] for w in data),
+                                          pos_column='xpos' if backend == 'hanlp' else 'upos',
+                                          comments={"backend": backend, "agreement": summary}))
+
+
+def write_result(out, fmt, lineno, text, sentences, err, pos_column, summaries=None):
+    if isinstance(sentences, dict):
+        write_compare(out, fmt, lineno, text, sentences, err, summaries)
+        return
+    if fmt == 'columnar':
+        # 列式文件只收成功的句子，失败的行只计入进度
+        if err is None and sentences:
+            out.append(sentences)
+    elif fmt == 'jsonl':
+        row = {"line": lineno, "text": text}
+        if err is not None:
+            row["error"] = err
+        else:
+            row["sentences"] = sentences or []
+            if summaries is not None:
+                row["metrics"] = summaries
+        out.write(json.dumps(row, ensure_ascii=False) + "\n")
+    elif err is not None or not sentences:
+        out.write(f"# sent_id = {lineno}\n# text = {text}\n# error = {err or 'empty result'}\n\n")
+    else:
+        # 一行里切出多句时按 行号-序号 编号
+        single = len(sentences) == 1
+        for k, data in enumerate(sentences):
+            comments = None
+            if summaries is not None:
+                comments = {"metrics": " ".join(f"{key}={value}" for key, value in summaries[k].items())}
+            out.write(format_sentence(data, sent_id=lineno if single else f"{lineno}-{k + 1}",
+                                      text=text if single else "".join(w['text'] for w in data),
+                                      pos_column=pos_column, comments=comments))
+
+
+def run(args):
+    backends = backends_of(args.model)
+    comparing = len(backends) > 1
+    backend = tuple(backends) if comparing else pipelines.backend_of(args.model)
+    if backend is None:
+        raise SystemExit(f"未知的分析内核: {args.model}")
+    # HanLP 给出的是 CTB 词性，写到 XPOS 列
+    pos_column = 'xpos' if backend == 'hanlp' else 'upos'
+
+    if args.format == 'columnar' and args.output == '-':
+        raise SystemExit("columnar 格式需要用 -o 指定输出文件")
+    if args.format == 'columnar' and comparing:
+        raise SystemExit("对比模式只支持 conllu / jsonl 输出")
+
+    src = sys.stdin if args.input == '-' else open(args.input, encoding=args.encoding)
+    if args.format == 'columnar':
+        out = ColumnarWriter(args.output)
+    else:
+        out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', newline='\n')
+    progress = Progress(sys.stderr, args.report_every)
+    latency = LatencyStats(window=100000)
+    throttled = 0
+    # 对比模式下汇总一致率，否则按需汇总语料统计
+    corpus = Agreement() if comparing else CorpusStats() if args.stats else None
+
+    def flush(chunk_result):
+        nonlocal throttled
+        results, latencies, chunk_throttled, stats = chunk_result
+        throttled += chunk_throttled
+        for seconds in latencies:
+            latency.add(seconds)
+        if stats is not None:
+            corpus.merge(stats)
+        failed = 0
+        for lineno, text, sentences, err, summaries in results:
+            write_result(out, args.format, lineno, text, sentences, err, pos_column, summaries)
+            failed += err is not None
+        progress.update(len(results), failed)
+
+    # 在途分片数有上限：读取速度永远不会把内存撑爆
+    max_pending = args.jobs * args.prefetch
+    completed = False
+    try:
+        hanlp_options = {"url": args.hanlp_url, "batch_size": args.hanlp_batch, "max_in_flight": args.hanlp_in_flight}
+        with mp.Pool(args.jobs, initializer=_init_worker,
+                     initargs=(backend, args.hanlp_key, args.threads_per_worker, hanlp_options,
+                               args.metrics, args.stats is not None)) as pool:
+            pending = deque()
+            for chunk in read_chunks(src, args.chunk_size):
+                pending.append(pool.apply_async(_parse_chunk, (chunk,)))
+                while len(pending) >= max_pending:
+                    flush(pending.popleft().get())
+            while pending:
+                flush(pending.popleft().get())
+        completed = True
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if isinstance(out, ColumnarWriter) and not completed:
+            # 中途出错或被打断时不留下截断的列式文件
+            out.abort()
+        elif out is not sys.stdout:
+            out.close()
+        else:
+            out.flush()
+    progress.report()
+    if comparing:
+        r = corpus.report()
+        names = " vs ".join(DISPLAY_NAMES.get(b, b) for b in backends)
+        sys.stderr.write(f"{names}: UAS {r['uas'] * 100:.2f}% · LAS {r['las'] * 100:.2f}% · "
+                         f"分词 F1 {r['token_f1'] * 100:.2f}% · 对齐 {r['aligned']} 词\n")
+    if corpus is not None and args.stats:
+        with open(args.stats, 'w', encoding='utf-8') as f:
+            json.dump(corpus.report(), f, ensure_ascii=False, indent=1)
+    if latency.count or throttled:
+        summary = latency.summary()
+        sys.stderr.write(f"HanLP 请求 {summary['count']} 次 · 平均 {summary['mean'] * 1000:.0f}ms · "
+                         f"p50 {summary['p50'] * 1000:.0f}ms · p95 {summary['p95'] * 1000:.0f}ms · "
+                         f"p99 {summary['p99'] * 1000:.0f}ms · 被限流 {throttled} 次\n")
+    return 1 if progress.failed else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="句法分析批处理：每行一个句子，输出 CoNLL-U / JSONL / 列式文件")
+    parser.add_argument('input', help="输入文本文件，'-' 表示标准输入")
+    parser.add_argument('-o', '--output', default='-', help="输出文件，默认标准输出")
+    parser.add_argument('-m', '--model', default='stanza',
+                        help="分析内核: stanza / hanlp；hanlp,stanza 为对比模式(同时分析并统计一致率)")
+    parser.add_argument('-f', '--format', default='conllu', choices=['conllu', 'jsonl', 'columnar'],
+                        help="columnar 为可 mmap 的列式二进制文件，见 columnar.py")
+    parser.add_argument('-j', '--jobs', type=int, default=max(1, mp.cpu_count() - 1), help="工作进程数")
+    parser.add_argument('--chunk-size', type=int, default=32, help="每个任务打包的句子数")
+    parser.add_argument('--prefetch', type=int, default=4, help="每个进程最多排队的分片数")
+    parser.add_argument('--metrics', action='store_true', help="附带每句的依存距离/树深/交叉弧等指标")
+    parser.add_argument('--stats', help="把语料级统计(句长-MDD、关系/词性频次、出度直方图)写到该 JSON 文件；"
+                                        "对比模式下写的是汇总的一致率")
+    parser.add_argument('--threads-per-worker', type=int, default=1, help="Stanza 每进程的 torch 线程数，0 表示不限制")
+    parser.add_argument('--hanlp-key', default=HANLP_KEY)
+    parser.add_argument('--hanlp-url', default=pipelines.HANLP_URL, help="HanLP 服务地址，可指向 mock_hanlp_server.py")
+    parser.add_argument('--hanlp-batch', type=int, default=32, help="每个 HanLP 请求打包的句子数")
+    parser.add_argument('--hanlp-in-flight', type=int, default=4, help="每个进程同时在途的 HanLP 请求数")
+    parser.add_argument('--encoding', default='utf-8')
+    parser.add_argument('--report-every', type=float, default=2.0, help="进度汇报间隔(秒)，0 关闭")
+    return parser
+
+
+def main(argv=None):
+    return run(build_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    mp.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,365 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import statistics
+
+import pipelines
+import parsing
+import metrics
+import web_assets
+from parse_cache import ParseCache
+
+# ================= 基准测试 =================
+# 用确定性的假 HanLP / Stanza 输出，分别测量：
+#   dispatch   AnalysisThread.run 的后端分发 (含记录构建、出度、写内存缓存；SQLite 提交不计入)
+#   records    HanLP 文档 -> 词记录、出度计算、指标计算
+#   page       清空资源缓存后从磁盘读取 index.html/view.js/view.css (冷启动路径) 与 to_page_json (json.dumps)
+#   render     离屏 QtWebEngine 中 showParse 到渲染完成
+# 用法: python bench.py --lengths 8,32,128 -o bench.json
+#       python bench.py --baseline bench.json --tolerance 0.15   # 比基线慢 15% 以上时返回 1
+
+POS_CYCLE = ['NN', 'VV', 'NN', 'AD', 'PN', 'VV', 'NR', 'DEC']
+RELS = ['nsubj', 'dobj', 'advmod', 'amod', 'nmod', 'conj', 'punct', 'dep']
+
+
+# ===== 假后端 =====
+
+def fake_tree(n, seed):
+    # 随机但确定的依存树：按随机顺序逐个挂到已在树上的词下面
+    rnd = random.Random(seed)
+    order = list(range(n))
+    rnd.shuffle(order)
+    heads = [0] * n
+    for k in range(1, n):
+        heads[order[k]] = order[rnd.randrange(k)] + 1
+    return heads
+
+
+def fake_text(length, count):
+    # count 句，每句 length 个两字词，句末用 "。" 分隔
+    chars = "我们想吃拉面今天天气很好明天去学校看书"
+    return "。".join("".join(chars[(k + i) % len(chars)] * 2 for i in range(length)) for k in range(count)) + "。"
+
+
+def _split(text):
+    return [s for s in text.split("。") if s]
+
+
+def _fake_sentence(sentence, seed):
+    tokens = [sentence[i:i + 2] for i in range(0, len(sentence), 2)]
+    heads = fake_tree(len(tokens), seed)
+    return tokens, heads
+
+
+class FakeHanLP:
+    def parse(self, text=None, tokens=None, tasks=None, **kwargs):
+        sentences = text if isinstance(text, list) else _split(text or "")
+        doc = {"tok/fine": [], "pos/ctb": [], "dep": []}
+        for k, sentence in enumerate(sentences):
+            tokens, heads = _fake_sentence(sentence, k)
+            doc["tok/fine"].append(tokens)
+            doc["pos/ctb"].append([POS_CYCLE[i % len(POS_CYCLE)] for i in range(len(tokens))])
+            doc["dep"].append([[h, 'root' if h == 0 else RELS[i % len(RELS)]] for i, h in enumerate(heads)])
+        return doc
+
+    __call__ = parse
+
+    def parse_sentences(self, sentences, tasks='dep'):
+        return self.parse(list(sentences), tasks=tasks)
+
+
+class _Obj:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class FakeStanza:
+    # 与 stanza.Pipeline 一样可以按处理器分步调用；所有工作都在 tokenize 一步完成
+    processors = dict.fromkeys(pipelines.STANZA_PROCESSORS.split(','))
+
+    def __call__(self, text, processors=None):
+        if not isinstance(text, str):
+            return text
+        sentences = []
+        for k, sentence in enumerate(_split(text)):
+            tokens, heads = _fake_sentence(sentence, k)
+            words = [_Obj(id=i + 1, text=t, upos=POS_CYCLE[i % len(POS_CYCLE)], head=h,
+                          deprel='root' if h == 0 else RELS[i % len(RELS)])
+                     for i, (t, h) in enumerate(zip(tokens, heads))]
+            sentences.append(_Obj(words=words))
+        return _Obj(sentences=sentences)
+
+
+def install_fake_backends():
+    pipelines.manager.register('hanlp', lambda **config: FakeHanLP(), serialize=False)
+    pipelines.manager.register('stanza', lambda **config: FakeStanza())
+
+
+# ===== 计时 =====
+
+def measure(fn, repeat, min_time=0.02):
+    # 先找出单次采样需要循环多少次才超过 min_time(同 timeit.autorange)，再采样 repeat 次
+    fn()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - start >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return summarize(samples, number)
+
+
+def summarize(samples, number=1):
+    ordered = sorted(samples)
+    return {"median": statistics.median(ordered), "mean": statistics.fmean(ordered), "min": ordered[0],
+            "p95": ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))],
+            "stdev": statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+            "samples": len(ordered), "number": number, "unit": "s"}
+
+
+# ===== 各项基准 =====
+
+class _Sink:
+    def __init__(self):
+        self.values = []
+
+    def emit(self, value):
+        # 只留第一次的结果，用来确认分发成功
+        if not self.values:
+            self.values.append(value)
+
+
+class _MemoryCache(ParseCache):
+    # 只保留内存层：SQLite 写入和 commit 的耗时取决于磁盘，不算在分发里
+    def put(self, text, backend, data):
+        if data:
+            with self._lock:
+                self._remember(self.key(text, backend), data)
+
+
+def bench_dispatch(args, results):
+    try:
+        import main
+    except ImportError as e:
+        print(f"跳过 dispatch: {e}", file=sys.stderr)
+        return
+    # AnalysisThread.run 会写缓存，换成临时目录里的只写内存的缓存，不碰用户的 ~/.syntaxlab
+    tmp = tempfile.mkdtemp(prefix='syntaxlab-bench-')
+    main.cache = _MemoryCache(os.path.join(tmp, 'bench.sqlite3'))
+    for model, backend in (("HanLP (云端API)", 'hanlp'), ("Stanza (学术标准)", 'stanza')):
+        for length in args.lengths:
+            text = fake_text(length, args.sentences)
+            thread = main.AnalysisThread(text, model, parsing.HANLP_KEY)
+            # 信号换成普通收集器：跨线程投递不在测量范围内，且 PySide6 在无事件循环时反复 emit 会泄漏引用
+            thread.finished, thread.error = _Sink(), _Sink()
+            thread.run()
+            if thread.error.values or not thread.finished.values:
+                raise RuntimeError(f"dispatch {backend} 失败: {thread.error.values}")
+            results[f"dispatch.{backend}.len{length}"] = measure(thread.run, args.repeat)
+
+
+def bench_records(args, results):
+    client = FakeHanLP()
+    for length in args.lengths:
+        text = fake_text(length, args.sentences)
+        doc = client(text)
+        sentences = parsing.hanlp_sentences(doc)
+        results[f"records.hanlp_sentences.len{length}"] = measure(lambda: parsing.hanlp_sentences(doc), args.repeat)
+        results[f"records.out_degree.len{length}"] = measure(lambda: metrics.fill_out_degree(sentences), args.repeat)
+        results[f"records.metrics.len{length}"] = measure(lambda: metrics.compute(sentences), args.repeat)
+
+
+def bench_page(args, results):
+    try:
+        import main
+    except ImportError as e:
+        print(f"跳过 page: {e}", file=sys.stderr)
+        return
+    # 资源读过一次就常驻内存，每次都先清空缓存，量的是首次加载页面时的磁盘读取
+    def load_assets():
+        with web_assets._lock:
+            web_assets._cache.clear()
+        for name in (web_assets.PAGE, 'view.js', 'view.css'):
+            web_assets.read_text(name)
+
+    results["page.assets_cold"] = measure(load_assets, args.repeat)
+    for length in args.lengths:
+        sentences = parsing.parse_hanlp(fake_text(length, args.sentences))
+        results[f"page.to_page_json.len{length}"] = measure(lambda: main.to_page_json(sentences), args.repeat)
+
+
+def bench_render(args, results):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    try:
+        import main
+        from PySide6.QtCore import Qt, QEventLoop, QTimer
+        from PySide6.QtWidgets import QApplication
+        QApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
+        from PySide6.QtWebEngineWidgets import QWebEngineView
+    except ImportError as e:
+        print(f"跳过 render: {e}", file=sys.stderr)
+        return
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    web_assets.register_scheme()
+    view = QWebEngineView()
+    web_assets.install(view.page().profile())
+    view.resize(1280, 850)
+    view.show()
+
+    def wait(signal_setup, timeout):
+        loop = QEventLoop()
+        state = {}
+        signal_setup(loop, state)
+        QTimer.singleShot(int(timeout * 1000), loop.quit)
+        loop.exec()
+        return state
+
+    def on_load(loop, state):
+        view.loadFinished.connect(lambda ok: (state.setdefault('ok', ok), loop.quit()))
+        view.load(web_assets.page_url())
+
+    if not wait(on_load, 30).get('ok'):
+        print("跳过 render: 页面加载失败", file=sys.stderr)
+        return
+
+    def render_once(payload):
+        # showParse 之后等两帧，保证布局和绘制已经完成
+        script = ("window.__benchDone = false; showParse(%s); "
+                  "requestAnimationFrame(() => requestAnimationFrame(() => { window.__benchDone = true; }));" % payload)
+        start = time.perf_counter()
+        view.page().runJavaScript(script)
+
+        def poll(loop, state):
+            def check():
+                view.page().runJavaScript("window.__benchDone === true", lambda done: finish(done))
+
+            def finish(done):
+                if done:
+                    state['elapsed'] = time.perf_counter() - start
+                    loop.quit()
+                else:
+                    QTimer.singleShot(1, check)
+
+            check()
+
+        return wait(poll, 30).get('elapsed')
+
+    for length in args.lengths:
+        payload = main.to_page_json(parsing.parse_hanlp(fake_text(length, args.sentences)))
+        empty = json.dumps([])
+        samples = []
+        for _ in range(args.repeat):
+            # 先清空，保证每次都是完整重建而不是签名命中后的复用
+            render_once(empty)
+            elapsed = render_once(payload)
+            if elapsed is None:
+                print(f"render len{length}: 超时", file=sys.stderr)
+                break
+            samples.append(elapsed)
+        if samples:
+            results[f"render.showParse.len{length}"] = summarize(samples)
+    view.close()
+    app.processEvents()
+
+
+SUITES = {'dispatch': bench_dispatch, 'records': bench_records, 'page': bench_page, 'render': bench_render}
+
+
+# ===== 结果与基线比较 =====
+
+def environment():
+    info = {"python": platform.python_version(), "platform": platform.platform(), "machine": platform.machine()}
+    from importlib import metadata
+    for package in ('numpy', 'PySide6'):
+        try:
+            info[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            info[package] = None
+    return info
+
+
+def compare(results, baseline, tolerance):
+    # 按中位数比较；只比较两边都有的项目
+    rows, regressions = [], []
+    for name, value in sorted(results.items()):
+        base = baseline.get(name)
+        ratio = value['median'] / base['median'] if base and base['median'] > 0 else None
+        rows.append((name, value['median'], base['median'] if base else None, ratio))
+        if ratio is not None and ratio > 1 + tolerance:
+            regressions.append(name)
+    return rows, regressions
+
+
+def _fmt(seconds):
+    if seconds is None:
+        return "-"
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f}µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds:.2f}s"
+
+
+def print_table(rows, tolerance, stream):
+    for name, median, base, ratio in rows:
+        mark = ""
+        if ratio is not None:
+            mark = f"x{ratio:.2f}" + ("  <-- 变慢" if ratio > 1 + tolerance else "  变快" if ratio < 1 - tolerance else "")
+        stream.write(f"{name:<40} {_fmt(median):>10} {_fmt(base):>10}  {mark}\n")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="句法分析/结果整形/渲染基准测试 (假后端)")
+    parser.add_argument('--suite', action='append', choices=sorted(SUITES), help="只跑指定项目，可重复；默认全部")
+    parser.add_argument('--lengths', default='8,32,128', help="每句的词数，逗号分隔")
+    parser.add_argument('--sentences', type=int, default=4, help="每段文本的句子数")
+    parser.add_argument('--repeat', type=int, default=15, help="每项采样次数")
+    parser.add_argument('-o', '--output', help="把结果写成 JSON，可作为之后的基线")
+    parser.add_argument('--baseline', help="与之前保存的结果比较")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="中位数变慢超过该比例视为回退")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.lengths = [int(x) for x in args.lengths.split(',') if x.strip()]
+    install_fake_backends()
+
+    results = {}
+    for name in args.suite or list(SUITES):
+        SUITES[name](args, results)
+
+    report = {"created": time.strftime('%Y-%m-%dT%H:%M:%S'), "environment": environment(),
+              "config": {"lengths": args.lengths, "sentences": args.sentences, "repeat": args.repeat},
+              "results": results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f).get('results', {})
+    rows, regressions = compare(results, baseline, args.tolerance)
+    print_table(rows, args.tolerance, sys.stdout)
+    if regressions:
+        print(f"{len(regressions)} 项比基线慢 {args.tolerance:.0%} 以上: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
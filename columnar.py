@@ -0,0 +1,265 @@
+import os
+import json
+import shutil
+import tempfile
+
+import numpy as np
+
+# ================= 列式分析结果 =================
+# 几十万句的结果如果存成 [{"id", "text", "pos", ...}] 字典列表，内存和 json.dumps 都扛不住。
+# 这里按列存放：
+#   ids / heads / out_degree      int32，每词一个
+#   pos / rel                     uint16 编码，对应 vocab 里的标签
+#   form_bytes + form_offsets     所有词的 UTF-8 拼接及每个词的起点
+#   offsets                       句子边界，第 k 句是 [offsets[k], offsets[k+1])
+# 文件格式: 8 字节魔数 | uint64 头长度 | JSON 头 | 按 64 字节对齐的各列原始数据，可直接 mmap。
+
+MAGIC = b'SYXCOL1\0'
+ALIGN = 64
+COLUMNS = (('ids', '<i4'), ('heads', '<i4'), ('out_degree', '<i4'), ('pos', '<u2'), ('rel', '<u2'),
+           ('form_offsets', '<i8'), ('form_bytes', '|u1'), ('offsets', '<i8'))
+
+
+class Vocab:
+    def __init__(self, labels=()):
+        self.labels = list(labels)
+        self._codes = {label: i for i, label in enumerate(self.labels)}
+
+    def code(self, label):
+        code = self._codes.get(label)
+        if code is None:
+            if len(self.labels) >= 0xFFFF:
+                raise ValueError("标签种类超过 uint16 上限")
+            code = self._codes[label] = len(self.labels)
+            self.labels.append(label)
+        return code
+
+    def get(self, label):
+        return self._codes.get(label)
+
+
+def _encode(sentences, pos_vocab, rel_vocab):
+    words = [w for data in sentences for w in data]
+    forms = [str(w['text']).encode('utf-8') for w in words]
+    lengths = np.fromiter((len(f) for f in forms), dtype=np.int64, count=len(forms))
+    return {
+        'ids': np.fromiter((w['id'] for w in words), dtype=np.int32, count=len(words)),
+        'heads': np.fromiter((w['head'] for w in words), dtype=np.int32, count=len(words)),
+        'out_degree': np.fromiter((w.get('out_degree', 0) for w in words), dtype=np.int32, count=len(words)),
+        'pos': np.fromiter((pos_vocab.code(w['pos']) for w in words), dtype=np.uint16, count=len(words)),
+        'rel': np.fromiter((rel_vocab.code(w['rel']) for w in words), dtype=np.uint16, count=len(words)),
+        'form_lengths': lengths,
+        'form_bytes': np.frombuffer(b''.join(forms), dtype=np.uint8),
+        'sentence_lengths': np.fromiter((len(data) for data in sentences), dtype=np.int64, count=len(sentences)),
+    }
+
+
+def _cumulative(lengths, start=0):
+    out = np.empty(len(lengths) + 1, dtype=np.int64)
+    out[0] = start
+    np.cumsum(lengths, out=out[1:])
+    out[1:] += start
+    return out
+
+
+class ParseColumns:
+    def __init__(self, arrays, pos_vocab, rel_vocab, mmap=None):
+        for name, _ in COLUMNS:
+            setattr(self, name, arrays[name])
+        self.pos_vocab = pos_vocab if isinstance(pos_vocab, Vocab) else Vocab(pos_vocab)
+        self.rel_vocab = rel_vocab if isinstance(rel_vocab, Vocab) else Vocab(rel_vocab)
+        self._mmap = mmap
+
+    @classmethod
+    def from_sentences(cls, sentences):
+        pos_vocab, rel_vocab = Vocab(), Vocab()
+        enc = _encode(sentences, pos_vocab, rel_vocab)
+        arrays = {name: enc[name] for name in ('ids', 'heads', 'out_degree', 'pos', 'rel', 'form_bytes')}
+        arrays['form_offsets'] = _cumulative(enc['form_lengths'])
+        arrays['offsets'] = _cumulative(enc['sentence_lengths'])
+        return cls(arrays, pos_vocab, rel_vocab)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def n_tokens(self):
+        return int(self.offsets[-1])
+
+    def span(self, k):
+        return int(self.offsets[k]), int(self.offsets[k + 1])
+
+    def forms(self, start, stop):
+        fo = self.form_offsets[start:stop + 1]
+        blob = self.form_bytes[fo[0]:fo[-1]].tobytes()
+        base = int(fo[0])
+        fo = (fo - base).tolist()
+        return [blob[fo[i]:fo[i + 1]].decode('utf-8') for i in range(len(fo) - 1)]
+
+    def sentence(self, k):
+        # 按需转换成原来的词记录字典列表
+        if k < 0:
+            k += len(self)
+        a, b = self.span(k)
+        pos_labels, rel_labels = self.pos_vocab.labels, self.rel_vocab.labels
+        return [{"id": i, "text": t, "pos": pos_labels[p], "head": h, "rel": rel_labels[r], "out_degree": d}
+                for i, t, p, h, r, d in zip(self.ids[a:b].tolist(), self.forms(a, b), self.pos[a:b].tolist(),
+                                            self.heads[a:b].tolist(), self.rel[a:b].tolist(),
+                                            self.out_degree[a:b].tolist())]
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return [self.sentence(i) for i in range(*k.indices(len(self)))]
+        return self.sentence(k)
+
+    def __iter__(self):
+        for k in range(len(self)):
+            yield self.sentence(k)
+
+    def arrays(self):
+        return {name: getattr(self, name) for name, _ in COLUMNS}
+
+    def to_arrow(self):
+        # 导出为 Arrow 逐词表；整数列和词形缓冲区零拷贝共享
+        import pyarrow as pa
+        n = self.n_tokens
+        sentence = np.repeat(np.arange(len(self), dtype=np.int64), np.diff(self.offsets))
+        forms = pa.LargeStringArray.from_buffers(n, pa.py_buffer(self.form_offsets), pa.py_buffer(self.form_bytes))
+        return pa.table({
+            'sentence': sentence, 'id': self.ids, 'text': forms,
+            'pos': pa.DictionaryArray.from_arrays(self.pos, pa.array(self.pos_vocab.labels, pa.string())),
+            'head': self.heads,
+            'rel': pa.DictionaryArray.from_arrays(self.rel, pa.array(self.rel_vocab.labels, pa.string())),
+            'out_degree': self.out_degree,
+        })
+
+    def save(self, path):
+        write_columns(path, self.arrays(), self.pos_vocab.labels, self.rel_vocab.labels)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        # mmap=True 时各列直接指向文件映射，不读入内存
+        if mmap:
+            buf = np.memmap(path, dtype=np.uint8, mode='r')
+        else:
+            buf = np.fromfile(path, dtype=np.uint8)
+        if buf[:len(MAGIC)].tobytes() != MAGIC:
+            raise ValueError(f"不是列式结果文件: {path}")
+        header_len = int(buf[8:16].view('<u8')[0])
+        header = json.loads(buf[16:16 + header_len].tobytes().decode('utf-8'))
+        arrays = {}
+        for name, dtype in COLUMNS:
+            meta = header['arrays'][name]
+            nbytes = meta['length'] * np.dtype(dtype).itemsize
+            arrays[name] = buf[meta['offset']:meta['offset'] + nbytes].view(dtype)
+        return cls(arrays, header['vocab']['pos'], header['vocab']['rel'], mmap=buf if mmap else None)
+
+
+def _padding(pos):
+    return (-pos) % ALIGN
+
+
+def write_columns(path, arrays, pos_labels, rel_labels):
+    # arrays 的值可以是 ndarray，也可以是 (临时文件路径, 元素个数)
+    sizes = {}
+    for name, dtype in COLUMNS:
+        value = arrays[name]
+        sizes[name] = value[1] if isinstance(value, tuple) else len(value)
+
+    def build_header(base):
+        layout, pos = {}, base
+        for name, dtype in COLUMNS:
+            pos += _padding(pos)
+            layout[name] = {"dtype": dtype, "offset": pos, "length": sizes[name]}
+            pos += sizes[name] * np.dtype(dtype).itemsize
+        return json.dumps({"version": 1, "vocab": {"pos": list(pos_labels), "rel": list(rel_labels)},
+                           "arrays": layout}, ensure_ascii=False).encode('utf-8')
+
+    # 头的长度会影响各列偏移，迭代到稳定为止
+    header = build_header(16)
+    while True:
+        again = build_header(16 + len(header))
+        if len(again) == len(header):
+            header = again
+            break
+        header = again
+
+    # 先写到同目录下独有的临时文件，写完整了才换上去：中途出错或几个进程同时写都不会留下半截文件
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp',
+                               dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        _write_file(fd, arrays, header)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    # mkstemp 建的文件只有属主可读，改回普通文件的权限
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+
+def _write_file(fd, arrays, header):
+    with os.fdopen(fd, 'wb') as f:
+        f.write(MAGIC)
+        f.write(np.array([len(header)], dtype='<u8').tobytes())
+        f.write(header)
+        for name, dtype in COLUMNS:
+            f.write(b'\0' * _padding(f.tell()))
+            value = arrays[name]
+            if isinstance(value, tuple):
+                with open(value[0], 'rb') as src:
+                    shutil.copyfileobj(src, f, 1024 * 1024)
+            else:
+                f.write(np.ascontiguousarray(value, dtype=dtype).tobytes())
+
+
+class ColumnarWriter:
+    # 流式写入：每列先追加到各自的临时文件，close() 时拼成一个可 mmap 的文件，内存占用与语料大小无关
+    def __init__(self, path):
+        self.path = path
+        self.pos_vocab, self.rel_vocab = Vocab(), Vocab()
+        self._dir = tempfile.mkdtemp(prefix='syxcol-', dir=os.path.dirname(os.path.abspath(path)))
+        self._files = {name: open(os.path.join(self._dir, name), 'wb') for name, _ in COLUMNS}
+        self._counts = {name: 0 for name, _ in COLUMNS}
+        self._tokens = 0
+        self._form_bytes = 0
+        self._write('offsets', np.zeros(1, dtype='<i8'))
+        self._write('form_offsets', np.zeros(1, dtype='<i8'))
+
+    def _write(self, name, array):
+        self._files[name].write(array.tobytes())
+        self._counts[name] += len(array)
+
+    def append(self, sentences):
+        if not sentences:
+            return
+        enc = _encode(sentences, self.pos_vocab, self.rel_vocab)
+        for name in ('ids', 'heads', 'out_degree', 'pos', 'rel', 'form_bytes'):
+            self._write(name, enc[name].astype(dict(COLUMNS)[name], copy=False))
+        self._write('form_offsets', _cumulative(enc['form_lengths'], self._form_bytes)[1:])
+        self._write('offsets', _cumulative(enc['sentence_lengths'], self._tokens)[1:])
+        self._form_bytes += len(enc['form_bytes'])
+        self._tokens += int(enc['sentence_lengths'].sum())
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        try:
+            arrays = {name: (os.path.join(self._dir, name), self._counts[name]) for name, _ in COLUMNS}
+            write_columns(self.path, arrays, self.pos_vocab.labels, self.rel_vocab.labels)
+        finally:
+            shutil.rmtree(self._dir, ignore_errors=True)
+
+    def abort(self):
+        # 丢弃已写的内容，不生成输出文件
+        for f in self._files.values():
+            f.close()
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,193 @@
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from parsing import HANLP_KEY, AnalysisCancelled, parse_text
+from timing import stage
+
+# ================= 多内核对比 =================
+# 同一段输入同时交给多个分析内核(各自一个线程，HanLP 等网络、Stanza 跑 torch，都不占 GIL)，
+# 总耗时取决于最慢的内核而不是总和。
+# 两边分词可能不同：按词在原文里的字符区间对齐，区间完全相同的词才参与比较；
+# 中心词也按区间比较(都是 ROOT 也算一致)，据此算 UAS / LAS 式的一致率和逐关系的分歧数。
+# Agreement 只存计数，可以跨句、跨进程合并(批处理对比模式)。
+
+BACKENDS = ('hanlp', 'stanza')
+DISPLAY_NAMES = {'hanlp': 'HanLP', 'stanza': 'Stanza'}
+
+
+def backends_of(model_name):
+    # "对比 (HanLP + Stanza)" 或命令行里的 "hanlp,stanza" -> ['hanlp', 'stanza']，按出现顺序
+    name = model_name.lower()
+    found = [(name.find(b), b) for b in BACKENDS if b in name]
+    return [b for _, b in sorted(found)]
+
+
+def is_compare(model_name):
+    return len(backends_of(model_name)) > 1
+
+
+# ===== 分词对齐 =====
+def char_spans(text, sentences):
+    # 每个词在原文里的 [起, 止)；只允许跳过空白，对不上(例如内核改写了字符)时按长度顺延
+    spans, pos = [], 0
+    for data in sentences:
+        for w in data:
+            token = str(w['text'])
+            i = text.find(token, pos)
+            if i < 0 or text[pos:i].strip():
+                i = pos
+            spans.append((i, i + len(token)))
+            pos = i + len(token)
+    return spans
+
+
+def _tokens(text, sentences):
+    # 全文词表: (区间, 中心词区间 或 None=ROOT, 关系)
+    spans = char_spans(text, sentences)
+    tokens, base = [], 0
+    for data in sentences:
+        for w in data:
+            head = w['head']
+            head_span = spans[base + head - 1] if 0 < head <= len(data) else None
+            tokens.append((spans[len(tokens)], head_span, w['rel']))
+        base += len(data)
+    return tokens
+
+
+class Agreement:
+    def __init__(self):
+        self.tokens_a = 0
+        self.tokens_b = 0
+        self.aligned = 0
+        self.heads = 0   # 中心词一致
+        self.labels = 0  # 中心词和关系都一致
+        self.by_rel = {}  # A 的关系 -> [对齐的词数, 中心词不同, 中心词相同但关系不同]
+        self.confusion = Counter()  # (A 的关系, B 的关系) -> 次数，只统计中心词相同的词
+
+    def add(self, text, a, b):
+        # 返回两边有分歧的词(全文下标)：没对齐上的，或者中心词/关系不同的
+        ta = _tokens(text, a)
+        tb = _tokens(text, b)
+        self.tokens_a += len(ta)
+        self.tokens_b += len(tb)
+        index_b = {span: j for j, (span, _, _) in enumerate(tb)}
+        diff_a, diff_b, matched = set(), set(), set()
+        for i, (span, head, rel) in enumerate(ta):
+            j = index_b.get(span)
+            if j is None:
+                diff_a.add(i)
+                continue
+            matched.add(j)
+            _, head_b, rel_b = tb[j]
+            self.aligned += 1
+            counts = self.by_rel.setdefault(rel, [0, 0, 0])
+            counts[0] += 1
+            if head != head_b:
+                counts[1] += 1
+            else:
+                self.heads += 1
+                if rel == rel_b:
+                    self.labels += 1
+                    continue
+                counts[2] += 1
+                self.confusion[(rel, rel_b)] += 1
+            diff_a.add(i)
+            diff_b.add(j)
+        diff_b.update(j for j in range(len(tb)) if j not in matched)
+        return diff_a, diff_b
+
+    def merge(self, other):
+        self.tokens_a += other.tokens_a
+        self.tokens_b += other.tokens_b
+        self.aligned += other.aligned
+        self.heads += other.heads
+        self.labels += other.labels
+        for rel, counts in other.by_rel.items():
+            mine = self.by_rel.setdefault(rel, [0, 0, 0])
+            for i, n in enumerate(counts):
+                mine[i] += n
+        self.confusion.update(other.confusion)
+        return self
+
+    def report(self, top=20):
+        def ratio(n, d):
+            return round(n / d, 4) if d else 0.0
+
+        precision, recall = ratio(self.aligned, self.tokens_b), ratio(self.aligned, self.tokens_a)
+        relations = sorted(([rel] + counts for rel, counts in self.by_rel.items()),
+                           key=lambda r: (-(r[2] + r[3]), -r[1], str(r[0])))
+        return {
+            "tokens": [self.tokens_a, self.tokens_b], "aligned": self.aligned,
+            "token_f1": round(2 * precision * recall / (precision + recall), 4) if precision + recall else 0.0,
+            "uas": ratio(self.heads, self.aligned), "las": ratio(self.labels, self.aligned),
+            # [关系, 对齐词数, 中心词不同, 关系不同]，分歧多的在前
+            "relations": relations[:top],
+            "confusion": [[a, b, n] for (a, b), n in self.confusion.most_common(top)],
+        }
+
+
+def _marks(sentences, diff):
+    # 全文下标 -> 每句的依存词编号
+    where = [(k, w['id']) for k, data in enumerate(sentences) for w in data]
+    marks = [[] for _ in sentences]
+    for i in sorted(diff):
+        k, token_id = where[i]
+        marks[k].append(token_id)
+    return marks
+
+
+def compare_parses(text, parses):
+    # parses: {后端: 句子列表}，第一个后端作为参照，其余逐个与它比较
+    # 返回 {"backends", "pairs": [一致率报告...], "marks": {后端: 每句有分歧的依存词编号}}
+    backends = list(parses)
+    ref = backends[0]
+    ref_diff = set()
+    pairs, marks = [], {}
+    for other in backends[1:]:
+        agreement = Agreement()
+        diff_ref, diff_other = agreement.add(text, parses[ref], parses[other])
+        ref_diff |= diff_ref
+        marks[other] = _marks(parses[other], diff_other)
+        pairs.append(dict(agreement.report(), a=ref, b=other))
+    marks[ref] = _marks(parses[ref], ref_diff)
+    return {"backends": backends, "pairs": pairs, "marks": marks}
+
+
+# ===== 并行分析 =====
+def parse_all(text, backends, hanlp_key=HANLP_KEY, timer=None, cancel=None, cache=None):
+    # 每个内核一个线程同时分析；返回 ({后端: 句子列表}, {后端: 秒})
+    # cache 为 parse_cache.ParseCache 时各内核分别读写缓存
+    def run(backend):
+        begin = time.perf_counter()
+        data = None
+        if cache is not None:
+            with stage(timer, f'{backend}.cache'):
+                data = cache.get(text, backend)
+        if data is None:
+            try:
+                data = parse_text(text, backend, hanlp_key, timer, cancel)
+            except AnalysisCancelled:
+                raise
+            except Exception as e:
+                # 错误信息注明是哪个内核
+                raise RuntimeError(f"{DISPLAY_NAMES.get(backend, backend)}: {e}") from e
+            if cache is not None and data:
+                cache.put(text, backend, data)
+        return data, time.perf_counter() - begin
+
+    with ThreadPoolExecutor(max_workers=len(backends), thread_name_prefix='compare') as pool:
+        futures = [(backend, pool.submit(run, backend)) for backend in backends]
+        results = [(backend, future.result()) for backend, future in futures]
+    return ({backend: data for backend, (data, _) in results},
+            {backend: seconds for backend, (_, seconds) in results})
+
+
+def run_compare(text, backends, hanlp_key=HANLP_KEY, timer=None, cancel=None, cache=None):
+    parses, seconds = parse_all(text, backends, hanlp_key, timer, cancel, cache)
+    with stage(timer, 'compare.align'):
+        result = compare_parses(text, parses)
+    result["parses"] = parses
+    result["seconds"] = {backend: round(s, 4) for backend, s in seconds.items()}
+    return result
+
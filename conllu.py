@@ -0,0 +1,54 @@
+# ================= CoNLL-U 读写 =================
+# 列: ID FORM LEMMA UPOS XPOS FEATS HEAD DEPREL DEPS MISC
+
+
+def _field(value):
+    value = str(value) if value not in (None, "") else "_"
+    # CoNLL-U 字段内不允许出现制表符和换行
+    return value.replace("\t", " ").replace("\n", " ")
+
+
+def format_sentence(data, sent_id=None, text=None, pos_column='upos', comments=None):
+    # comments: 额外的 {键: 值} 注释行，写在 # text 之后
+    lines = []
+    if sent_id is not None:
+        lines.append(f"# sent_id = {sent_id}")
+    if text is not None:
+        lines.append(f"# text = {_field(text)}")
+    for key, value in (comments or {}).items():
+        lines.append(f"# {key} = {_field(value)}")
+    for w in data:
+        upos, xpos = (w['pos'], None) if pos_column == 'upos' else (None, w['pos'])
+        lines.append("\t".join([
+            _field(w['id']), _field(w['text']), "_", _field(upos), _field(xpos), "_",
+            _field(w['head']), _field(w['rel']), "_", "_"]))
+    return "\n".join(lines) + "\n\n"
+
+
+def _int(value, default=0):
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+
+def parse_sentence(block):
+    # 一个句子块(不含空行) -> (词记录列表, {注释键: 值})，记录格式与 parse_text 的结果相同
+    # 多词单元(1-2)和空节点(1.1)不是依存树上的节点，跳过；UPOS 为空时用 XPOS
+    data, comments = [], {}
+    for line in block.splitlines():
+        line = line.rstrip('\r')
+        if not line:
+            continue
+        if line.startswith('#'):
+            key, sep, value = line[1:].partition('=')
+            if sep:
+                comments[key.strip()] = value.strip()
+            continue
+        cols = line.split('\t')
+        if len(cols) < 8 or '-' in cols[0] or '.' in cols[0]:
+            continue
+        pos = cols[3] if cols[3] != '_' else cols[4]
+        data.append({"id": _int(cols[0]), "text": cols[1], "pos": pos if pos != '_' else "X",
+                     "head": _int(cols[6]), "rel": cols[7], "out_degree": 0})
+    return data, comments
@@ -0,0 +1,146 @@
+from collections import Counter
+
+import numpy as np
+
+import metrics
+
+# ================= 语料级统计 (流式、可合并) =================
+# 分析结果一块一块地喂进来，内存占用固定：
+#   按句长分桶的句数 / MDD 和 / MDD 平方和 / 树深和 / 交叉弧和 / 有依存弧的句数 (超过 MAX_LENGTH 的并入最后一桶)
+#   没有依存弧的句子(只有根)没有 MDD，不进 MDD 的均值、分位数和直方图
+#   依存距离、出度、MDD 的定长直方图
+#   关系标签和词性的 Misra-Gries 频繁项摘要 (标签种类不超过容量时计数精确)
+# 两个 CorpusStats 可以 merge：批处理各进程分别统计，主进程合并。
+
+MAX_LENGTH = 120
+MAX_DEGREE = 16
+MAX_DISTANCE = 32
+MDD_BIN = 0.1
+MDD_BINS = 100  # 0 ~ 10，更大的 MDD 并入最后一格
+
+
+class TopK:
+    # 可合并的 Misra-Gries 摘要；error 是任一计数可能被低估的上限
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.counts = {}
+        self.total = 0
+        self.error = 0
+
+    def update(self, counts):
+        for label, n in counts.items():
+            self.counts[label] = self.counts.get(label, 0) + n
+            self.total += n
+        self._reduce()
+
+    def merge(self, other):
+        self.update(other.counts)
+        # update 已经累加了对方保留下来的计数；对方被削掉的部分补回总数和误差
+        self.total += other.total - sum(other.counts.values())
+        self.error += other.error
+
+    def _reduce(self):
+        if len(self.counts) <= self.capacity:
+            return
+        cut = sorted(self.counts.values(), reverse=True)[self.capacity]
+        self.counts = {label: n - cut for label, n in self.counts.items() if n > cut}
+        self.error += cut
+
+    def most_common(self, n=None):
+        return sorted(self.counts.items(), key=lambda item: (-item[1], str(item[0])))[:n]
+
+
+def _quantile(hist, q, width):
+    total = hist.sum()
+    if total == 0:
+        return 0.0
+    k = int(np.searchsorted(np.cumsum(hist), q * total))
+    return round((min(k, len(hist) - 1) + 0.5) * width, 4)
+
+
+class CorpusStats:
+    def __init__(self, label_capacity=256):
+        self.sentences = 0
+        self.tokens = 0
+        self.relations = 0
+        self.tdd = 0
+        self.errors = 0
+        self.by_length = np.zeros((6, MAX_LENGTH + 1))  # 句数, MDD 和, MDD 平方和, 树深和, 交叉弧和, 有弧句数
+        self.distance_hist = np.zeros(MAX_DISTANCE + 1, dtype=np.int64)
+        self.degree_hist = np.zeros(MAX_DEGREE + 1, dtype=np.int64)
+        self.mdd_hist = np.zeros(MDD_BINS, dtype=np.int64)
+        self.rel = TopK(label_capacity)
+        self.pos = TopK(label_capacity)
+
+    def update(self, sentences):
+        # sentences: [[词记录, ...], ...]，与 parse_text 的结果相同
+        sentences = [data for data in sentences if data]
+        if not sentences:
+            return self
+        heads, offsets = metrics.flatten(sentences)
+        self._update_arrays(heads, offsets)
+        self.rel.update(Counter(w['rel'] for data in sentences for w in data))
+        self.pos.update(Counter(w['pos'] for data in sentences for w in data))
+        return self
+
+    def _update_arrays(self, heads, offsets):
+        result = metrics.compute_arrays(heads, offsets)
+        lengths, relations, mdd = result['length'], result['relations'], result['mdd']
+        self.sentences += len(lengths)
+        self.tokens += int(lengths.sum())
+        self.relations += int(relations.sum())
+        self.tdd += int(result['tdd'].sum())
+
+        bucket = np.minimum(lengths, MAX_LENGTH)
+        has_arcs = relations > 0
+        for row, weights in enumerate((np.ones(len(lengths)), mdd, mdd * mdd, result['tree_depth'],
+                                       result['crossings'], has_arcs)):
+            self.by_length[row] += np.bincount(bucket, weights=weights, minlength=MAX_LENGTH + 1)
+
+        distance = result['distance']
+        self.distance_hist += np.bincount(np.minimum(distance[distance > 0], MAX_DISTANCE),
+                                          minlength=MAX_DISTANCE + 1)
+        self.degree_hist += np.bincount(np.minimum(result['out_degree'], MAX_DEGREE), minlength=MAX_DEGREE + 1)
+        bins = np.minimum((mdd[has_arcs] / MDD_BIN).astype(np.int64), MDD_BINS - 1)
+        self.mdd_hist += np.bincount(bins, minlength=MDD_BINS)
+
+    def merge(self, other):
+        self.sentences += other.sentences
+        self.tokens += other.tokens
+        self.relations += other.relations
+        self.tdd += other.tdd
+        self.errors += other.errors
+        self.by_length += other.by_length
+        self.distance_hist += other.distance_hist
+        self.degree_hist += other.degree_hist
+        self.mdd_hist += other.mdd_hist
+        self.rel.merge(other.rel)
+        self.pos.merge(other.pos)
+        return self
+
+    def report(self, top=30):
+        # 可直接 json.dumps 的汇总，网页图表和 --stats 输出共用
+        count, mdd_sum, mdd_sq, depth_sum, cross_sum, with_arcs = self.by_length
+        # MDD 只在有依存弧的句子上平均，和 mdd_hist 的口径一致
+        n = float(with_arcs.sum())
+        mean = float(mdd_sum.sum()) / n if n else 0.0
+        var = max(0.0, float(mdd_sq.sum()) / n - mean * mean) if n else 0.0
+        by_length = [[int(k), int(count[k]), round(float(mdd_sum[k] / with_arcs[k]), 4) if with_arcs[k] else 0.0,
+                      round(float(depth_sum[k] / count[k]), 3), round(float(cross_sum[k] / count[k]), 3)]
+                     for k in np.nonzero(count)[0]]
+        return {
+            "sentences": self.sentences, "tokens": self.tokens, "relations": self.relations,
+            "errors": self.errors,
+            "mdd": round(self.tdd / self.relations, 4) if self.relations else 0.0,
+            "sentence_mdd": {"mean": round(mean, 4), "std": round(var ** 0.5, 4),
+                             "p50": _quantile(self.mdd_hist, 0.5, MDD_BIN),
+                             "p90": _quantile(self.mdd_hist, 0.9, MDD_BIN)},
+            # [句长, 句数, 平均 MDD, 平均树深, 平均交叉弧]；最后一桶是 >= MAX_LENGTH
+            "by_length": by_length, "max_length": MAX_LENGTH,
+            "rel": [[label, n] for label, n in self.rel.most_common(top)], "rel_total": self.rel.total,
+            "pos": [[label, n] for label, n in self.pos.most_common(top)], "pos_total": self.pos.total,
+            "label_error": max(self.rel.error, self.pos.error),
+            "distance_hist": self.distance_hist.tolist(),
+            "degree_hist": self.degree_hist.tolist(),
+            "mdd_hist": self.mdd_hist.tolist(), "mdd_bin": MDD_BIN,
+        }
@@ -0,0 +1,362 @@
+import os
+import re
+import sys
+import json
+import argparse
+import unicodedata
+import multiprocessing as mp
+from collections import deque
+from xml.sax.saxutils import escape, quoteattr
+
+from progress import Progress
+
+# ================= 依存图批量导出 (SVG / PNG，不开窗口) =================
+# 用法: python export.py treebank.conllu -o figures -f svg,png -j 8
+# 布局是 view.js 里 computeLayout 的 Python 版本(同样的词宽规则、弧层级和尺寸常量)，
+# 同步算完直接写文件，不依赖页面渲染和字体加载时机。
+# SVG 只用 Tiny 规范里的属性(不用 CSS、marker)，浏览器和 QtSvg 都能按原样显示；
+# PNG 由工作进程里的 QSvgRenderer 离屏栅格化，此时词宽改用 Qt 实测。
+# 输入可以是 CoNLL-U 树库、batch.py 的 jsonl 或 columnar 输出；-q 只导出检索命中的句子并高亮命中的弧。
+
+LAYOUT = {"pad": 60, "gap": 24, "min_word": 50, "level": 28, "max_height": 1400, "word_row": 70}
+SERIF = ['Noto Serif SC', 'Noto Serif CJK SC', 'Source Han Serif SC', 'serif']
+SANS = ['Inter', 'Helvetica', 'Arial', 'sans-serif']
+WORD_FONT = (SERIF, 24, 700)
+POS_FONT = (SANS, 12, 600)
+LABEL_FONT = (SANS, 13, 600)
+FORMATS = ('svg', 'png')
+
+
+def estimate_width(text, font):
+    # 不加载字体时的估计：全角字符一个字号宽，其余按字号的 0.6 倍(大写 0.7)
+    size = font[1]
+    width = 0.0
+    for c in str(text):
+        if unicodedata.east_asian_width(c) in 'WF':
+            width += size
+        elif c.isupper():
+            width += size * 0.7
+        else:
+            width += size * 0.6
+    return width
+
+
+# ===== 布局 =====
+def compute_layout(data, measure=estimate_width):
+    n = len(data)
+    widths = []
+    for w in data:
+        pos = str(w['pos']).upper()
+        widths.append(max(LAYOUT['min_word'], measure(w['text'], WORD_FONT),
+                          measure(pos, POS_FONT) + len(pos) * 0.5 + 22))
+    xs = [0.0] * (n + 1)
+    x = LAYOUT['pad']
+    for i, width in enumerate(widths):
+        xs[i + 1] = x + width / 2
+        x += width + LAYOUT['gap']
+
+    # 按跨度从短到长排：每条弧的层级 = 它覆盖的词间空隙里已有的最高层 + 1
+    levels = [0] * (n + 1)
+    cover = [0] * (n + 1)
+    max_level = 0
+    for w in sorted((w for w in data if 0 < w['head'] <= n), key=lambda w: abs(w['head'] - w['id'])):
+        left, right = min(w['id'], w['head']), max(w['id'], w['head'])
+        lv = max(cover[left:right], default=0) + 1
+        levels[w['id']] = lv
+        max_level = max(max_level, lv)
+        for p in range(left, right):
+            cover[p] = lv
+
+    # 嵌套很深时压缩层间距，避免画布高度失控
+    step = max(6, min(LAYOUT['level'], LAYOUT['max_height'] / max(1, max_level)))
+
+    def arc_height(lv):
+        return 20 + lv * step
+
+    y0 = 30 + arc_height(max_level + 1) * 1.1
+    arcs = []
+    for w in data:
+        x = xs[w['id']]
+        if not 0 < w['head'] <= n:
+            top = y0 - arc_height(max_level) - 10
+            arcs.append({"dep": w['id'], "head": 0, "d": f"M{x:.1f},{y0:.1f} V{top:.1f}",
+                         "lx": x, "ly": top - 10, "txt": 'ROOT'})
+            continue
+        hx, h = xs[w['head']], arc_height(levels[w['id']])
+        cp = y0 - h * 1.3
+        arcs.append({"dep": w['id'], "head": w['head'],
+                     "d": f"M{hx:.1f},{y0:.1f} C{hx:.1f},{cp:.1f} {x:.1f},{cp:.1f} {x:.1f},{y0:.1f}",
+                     "lx": (hx + x) / 2, "ly": y0 - h * 1.05, "txt": w['rel']})
+    width = x - LAYOUT['gap'] + LAYOUT['pad'] if n else 2 * LAYOUT['pad']
+    return {"n": n, "xs": xs, "widths": widths, "arcs": arcs, "y0": y0,
+            "height": y0 + LAYOUT['word_row'] - 10, "width": width}
+
+
+# ===== SVG =====
+def _font(font):
+    families, size, weight = font
+    return (f'font-family={quoteattr(", ".join(families))} font-size="{size}" font-weight="{weight}"')
+
+
+def to_svg(data, marks=(), title=None, measure=estimate_width):
+    # marks: 高亮的依存词编号(检索命中)，颜色和页面上的 .match 一致
+    L = compute_layout(data, measure)
+    width, height, y0 = round(L['width']), round(L['height']), L['y0']
+    marks = set(marks)
+    out = [f'<svg xmlns="http://www.w3.org/2000/svg" version="1.2" baseProfile="tiny" '
+           f'width="{width}" height="{height}" viewBox="0 0 {width} {height}">',
+           f'<rect x="0" y="0" width="{width}" height="{height}" fill="#ffffff"/>']
+    if title is not None:
+        out.append(f'<text x="16" y="22" {_font((SANS, 13, 700))} fill="#9ca3af">{escape(str(title))}</text>')
+
+    labels = []
+    for a in L['arcs']:
+        match = a['dep'] in marks
+        color = '#f59e0b' if match else '#d1d5db' if a['head'] == 0 else '#9ca3af'
+        dash = ' stroke-dasharray="4,4"' if a['head'] == 0 else ''
+        out.append(f'<path d="{a["d"]}" fill="none" stroke="{color}" '
+                   f'stroke-width="{2.5 if match else 1.5}"{dash}/>')
+        if a['head'] != 0:
+            x = L['xs'][a['dep']]
+            out.append(f'<polygon points="{x - 4:.1f},{y0 - 8:.1f} {x + 4:.1f},{y0 - 8:.1f} {x:.1f},{y0:.1f}" '
+                       f'fill="{color}"/>')
+        # 标签最后画，压在所有弧线上面；白色描边垫底代替 paint-order
+        families, size, weight = LABEL_FONT
+        font = _font((families, size, 700 if match else weight))
+        position = f'x="{a["lx"]:.1f}" y="{a["ly"]:.1f}" text-anchor="middle" {font}'
+        txt = escape(str(a['txt']))
+        labels.append(f'<text {position} fill="#ffffff" stroke="#ffffff" stroke-width="6" '
+                      f'stroke-linejoin="round">{txt}</text>')
+        labels.append(f'<text {position} fill="{"#b45309" if match else "#4b5563"}">{txt}</text>')
+    out.extend(labels)
+
+    top = height - LAYOUT['word_row']
+    for i, w in enumerate(data):
+        x = L['xs'][i + 1]
+        match = w['id'] in marks
+        out.append(f'<text x="{x:.1f}" y="{top + 28}" text-anchor="middle" {_font(WORD_FONT)} fill="#111827">'
+                   f'{escape(str(w["text"]))}</text>')
+        pos = str(w['pos']).upper()
+        pw = measure(pos, POS_FONT) + 20
+        fill, stroke, ink = ('#fef3c7', '#fde68a', '#92400e') if match else ('#f3f4f6', '#e5e7eb', '#4b5563')
+        out.append(f'<rect x="{x - pw / 2:.1f}" y="{top + 40}" width="{pw:.1f}" height="22" rx="11" ry="11" '
+                   f'fill="{fill}" stroke="{stroke}"/>')
+        out.append(f'<text x="{x:.1f}" y="{top + 55}" text-anchor="middle" {_font(POS_FONT)} fill="{ink}">'
+                   f'{escape(pos)}</text>')
+    out.append('</svg>')
+    return "\n".join(out) + "\n"
+
+
+# ===== PNG (工作进程里离屏渲染) =====
+_formats = ('svg',)
+_out_dir = '.'
+_scale = 2.0
+_measure = estimate_width
+_app = None
+
+
+def _qt_measure():
+    from PySide6.QtGui import QFont, QFontMetricsF
+    metrics = {}
+
+    def measure(text, font):
+        families, size, weight = font
+        key = (tuple(families), size, weight)
+        fm = metrics.get(key)
+        if fm is None:
+            qfont = QFont()
+            qfont.setFamilies(families)
+            qfont.setPixelSize(size)
+            qfont.setWeight(QFont.Weight(weight))
+            fm = metrics[key] = QFontMetricsF(qfont)
+        return fm.horizontalAdvance(str(text))
+    return measure
+
+
+def _init_worker(formats, out_dir, scale):
+    global _formats, _out_dir, _scale, _measure, _app
+    _formats, _out_dir, _scale = formats, out_dir, scale
+    if 'png' not in formats:
+        return
+    # 每个工作进程一个无窗口的 QGuiApplication，栅格化和量字宽都要用到字体
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PySide6.QtGui import QGuiApplication
+    _app = QGuiApplication.instance() or QGuiApplication([])
+    _measure = _qt_measure()
+
+
+def rasterize(svg, path, scale=2.0):
+    from PySide6.QtCore import QByteArray, Qt
+    from PySide6.QtGui import QImage, QPainter
+    from PySide6.QtSvg import QSvgRenderer
+    renderer = QSvgRenderer(QByteArray(svg.encode('utf-8')))
+    if not renderer.isValid():
+        raise ValueError("SVG 无法解析")
+    size = renderer.defaultSize()
+    image = QImage(max(1, round(size.width() * scale)), max(1, round(size.height() * scale)),
+                   QImage.Format_ARGB32_Premultiplied)
+    image.fill(Qt.white)
+    painter = QPainter(image)
+    painter.setRenderHints(QPainter.Antialiasing | QPainter.TextAntialiasing | QPainter.SmoothPixmapTransform)
+    renderer.render(painter)
+    painter.end()
+    if not image.save(path, 'PNG'):
+        raise OSError(f"写入失败: {path}")
+
+
+def file_stem(name):
+    return re.sub(r'[^\w.-]+', '_', str(name)).strip('._') or 'sentence'
+
+
+def _export_chunk(chunk):
+    # 返回 (成功数, [(名字, 错误)])
+    done, errors = 0, []
+    for seq, name, data, marks in chunk:
+        try:
+            svg = to_svg(data, marks, title=f"#{name}", measure=_measure)
+            # sent_id 可能重复，或者清理后撞名：文件名以导出序号开头，保证每句一个文件
+            stem = os.path.join(_out_dir, f"{seq:06d}_{file_stem(name)}")
+            if 'svg' in _formats:
+                with open(stem + '.svg', 'w', encoding='utf-8', newline='\n') as f:
+                    f.write(svg)
+            if 'png' in _formats:
+                rasterize(svg, stem + '.png', _scale)
+            done += 1
+        except Exception as e:
+            errors.append((name, str(e)))
+    return done, errors
+
+
+# ===== 读入分析结果 =====
+def read_jsonl(path):
+    # batch.py -f jsonl 的输出；对比模式的行按内核分别导出
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if "parses" in row:
+                for backend, sentences in row["parses"].items():
+                    for k, data in enumerate(sentences):
+                        yield f"{row['line']}-{k + 1}-{backend}", data, ()
+            for k, data in enumerate(row.get("sentences") or []):
+                yield f"{row['line']}-{k + 1}", data, ()
+
+
+def read_treebank(path, query=None):
+    from treebank import Treebank
+    with Treebank(path) as tb:
+        if query is None:
+            hits = ((k, ()) for k in range(len(tb)))
+        else:
+            # 树库先转成列式缓存再检索，句号与树库一致，名字仍取 sent_id
+            from search import open_corpus
+            hits = ((k, marked) for k, _, marked in _search(open_corpus(path), query))
+        for k, marks in hits:
+            data, comments = tb.sentence(k)
+            yield comments.get('sent_id', k + 1), data, marks
+
+
+def _search(cols, query):
+    from search import SearchIndex
+    return SearchIndex(cols).search(query)
+
+
+def read_sentences(path, query=None):
+    # 产出 (名字, 词记录列表, 高亮的依存词编号)，空句跳过
+    from columnar import MAGIC, ParseColumns
+    with open(path, 'rb') as f:
+        head = f.read(len(MAGIC))
+    if head == MAGIC:
+        cols = ParseColumns.load(path)
+        if query is None:
+            items = ((k + 1, cols.sentence(k), ()) for k in range(len(cols)))
+        else:
+            items = ((k + 1, cols.sentence(k), marked) for k, _, marked in _search(cols, query))
+    elif head.lstrip()[:1] == b'{':
+        items = read_jsonl(path)
+        if query is not None:
+            # JSONL 没有现成的列式文件：整个读进内存转成列再检索，按句序对回名字和原记录
+            import metrics
+            rows = [(name, data) for name, data, _ in items]
+            cols = ParseColumns.from_sentences(metrics.fill_out_degree([data for _, data in rows]))
+            items = (rows[k] + (marked,) for k, _, marked in _search(cols, query))
+    else:
+        items = read_treebank(path, query)
+    for name, data, marks in items:
+        if data:
+            yield name, data, marks
+
+
+def _chunks(items, size, limit):
+    chunk = []
+    for i, item in enumerate(items):
+        if limit and i >= limit:
+            break
+        chunk.append((i + 1,) + tuple(item))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ===== 命令行 =====
+def run(args):
+    formats = tuple(f for f in FORMATS if f in args.format.split(','))
+    if not formats:
+        raise SystemExit(f"未知的导出格式: {args.format}")
+    query = None
+    if args.query:
+        from search import QueryError, parse_query
+        try:
+            query = parse_query(args.query)
+        except QueryError as e:
+            raise SystemExit(str(e))
+    os.makedirs(args.output, exist_ok=True)
+    progress = Progress(sys.stderr, args.report_every)
+    failures = []
+
+    def flush(result):
+        done, errors = result
+        failures.extend(errors)
+        progress.update(done + len(errors), len(errors))
+
+    # 在途分片数有上限，读取再快也不会把内存撑爆
+    max_pending = args.jobs * args.prefetch
+    with mp.Pool(args.jobs, initializer=_init_worker, initargs=(formats, args.output, args.scale)) as pool:
+        pending = deque()
+        for chunk in _chunks(read_sentences(args.input, query), args.chunk_size, args.limit):
+            pending.append(pool.apply_async(_export_chunk, (chunk,)))
+            while len(pending) >= max_pending:
+                flush(pending.popleft().get())
+        while pending:
+            flush(pending.popleft().get())
+    progress.report()
+    for name, err in failures[:20]:
+        sys.stderr.write(f"  #{name}: {err}\n")
+    return 1 if failures else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="把分析结果逐句导出成依存弧线图 (SVG / PNG)")
+    parser.add_argument('input', help="CoNLL-U 树库，或 batch.py 的 jsonl / columnar 输出")
+    parser.add_argument('-o', '--output', default='figures', help="输出目录，每句一个文件，命名为 导出序号_句号")
+    parser.add_argument('-f', '--format', default='svg', help="svg / png / svg,png")
+    parser.add_argument('-q', '--query', help="只导出检索命中的句子并高亮命中处，语法见 search.py")
+    parser.add_argument('-n', '--limit', type=int, default=0, help="最多导出多少句，0 表示不限")
+    parser.add_argument('--scale', type=float, default=2.0, help="PNG 的像素倍率")
+    parser.add_argument('-j', '--jobs', type=int, default=max(1, mp.cpu_count() - 1), help="工作进程数")
+    parser.add_argument('--chunk-size', type=int, default=64, help="每个任务打包的句子数")
+    parser.add_argument('--prefetch', type=int, default=4, help="每个进程最多排队的分片数")
+    parser.add_argument('--report-every', type=float, default=2.0, help="进度汇报间隔(秒)，0 关闭")
+    return parser
+
+
+def main(argv=None):
+    return run(build_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    mp.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,197 @@
+import json
+import time
+import queue
+import random
+import threading
+import http.client
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+# ================= HanLP REST 客户端 =================
+# 复用长连接；多个句子打包进一次请求；限制同时在途的请求数；
+# 遇到 429/5xx 指数退避加抖动重试(不短于 Retry-After)；429 有单独的重试额度，不占用出错重试次数；
+# 只记录成功请求的耗时，被限流的次数单独计数。
+# 协议与 hanlp_restful.HanLPClient 相同: POST {url}/parse，返回 {任务名: 按句列表}
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class HanLPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(f"HanLP {status}: {message}")
+        self.status = status
+
+
+class LatencyStats:
+    # 最近 window 次的耗时(秒)，用于报告分位数
+    def __init__(self, window=1024):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+            self.total += seconds
+
+    def drain(self):
+        with self._lock:
+            samples = list(self._samples)
+            self._samples.clear()
+            return samples
+
+    def percentile(self, q):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(round(q / 100 * (len(samples) - 1))))]
+
+    def summary(self):
+        return {"count": self.count, "mean": self.total / self.count if self.count else 0.0,
+                "p50": self.percentile(50), "p95": self.percentile(95), "p99": self.percentile(99)}
+
+
+class HanLPBatchClient:
+    def __init__(self, url, auth=None, language='zh', batch_size=32, max_in_flight=4,
+                 max_retries=5, max_throttled=30, backoff=0.5, timeout=60):
+        parts = urlsplit(url)
+        self._https = parts.scheme == 'https'
+        self._host = parts.hostname
+        self._port = parts.port
+        self._path = parts.path.rstrip('/')
+        self._language = language
+        self._headers = {"Content-Type": "application/json", "Accept": "application/json",
+                         "Connection": "keep-alive"}
+        if auth:
+            self._headers["Authorization"] = f"Basic {auth}"
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.max_throttled = max_throttled
+        self.backoff = backoff
+        self.timeout = timeout
+        self.latency = LatencyStats()
+        self.throttled = 0  # 被 429 拒绝的总次数
+        self._throttled_pending = 0
+        # 空闲长连接池 + 在途请求上限
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._cooldown_lock = threading.Lock()
+        self._cooldown_until = 0.0
+        self._executor = ThreadPoolExecutor(max_in_flight, thread_name_prefix='hanlp')
+
+    def _connect(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            cls = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+            return cls(self._host, self._port, timeout=self.timeout)
+
+    def _cooldown(self, seconds):
+        # 被限流时所有线程一起让路，而不是各自继续撞墙
+        with self._cooldown_lock:
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + seconds)
+
+    def _note_throttled(self):
+        with self._cooldown_lock:
+            self.throttled += 1
+            self._throttled_pending += 1
+
+    def drain_throttled(self):
+        # 上次调用以来被限流的次数
+        with self._cooldown_lock:
+            n, self._throttled_pending = self._throttled_pending, 0
+            return n
+
+    def _wait_cooldown(self):
+        delay = self._cooldown_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _retry_delay(self, attempt, retry_after=None):
+        # 指数退避加抖动；有 Retry-After 时取两者中较大的，抖动只往后推，
+        # 免得各线程、各进程在同一时刻醒来再一起撞上限流
+        delay = min(30.0, self.backoff * (2 ** attempt))
+        try:
+            floor = float(retry_after) if retry_after else 0.0
+        except ValueError:
+            floor = 0.0
+        if floor:
+            return max(floor, delay) * random.uniform(1.0, 1.5)
+        return delay * random.uniform(0.5, 1.5)
+
+    def _post(self, endpoint, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        attempt = throttled = 0
+        with self._slots:
+            while True:
+                self._wait_cooldown()
+                conn = self._connect()
+                start = time.perf_counter()
+                try:
+                    conn.request("POST", self._path + endpoint, body=body, headers=self._headers)
+                    resp = conn.getresponse()
+                    data = resp.read()
+                except (http.client.HTTPException, OSError) as e:
+                    # 服务端关掉了长连接或网络抖动：丢弃连接，稍后重试
+                    conn.close()
+                    if attempt >= self.max_retries:
+                        raise HanLPError(0, str(e)) from e
+                    time.sleep(self._retry_delay(attempt))
+                    attempt += 1
+                    continue
+                elapsed = time.perf_counter() - start
+
+                if resp.will_close:
+                    conn.close()
+                else:
+                    self._idle.put(conn)
+
+                if resp.status == 200:
+                    self.latency.add(elapsed)
+                    return json.loads(data)
+                if resp.status == 429 and throttled < self.max_throttled:
+                    self._note_throttled()
+                    self._cooldown(self._retry_delay(throttled, resp.getheader('Retry-After')))
+                    throttled += 1
+                    continue
+                if resp.status in RETRY_STATUS and resp.status != 429 and attempt < self.max_retries:
+                    time.sleep(self._retry_delay(attempt, resp.getheader('Retry-After')))
+                    attempt += 1
+                    continue
+                try:
+                    message = json.loads(data).get('detail', data.decode('utf-8', 'replace'))
+                except (ValueError, AttributeError):
+                    message = data.decode('utf-8', 'replace')
+                raise HanLPError(resp.status, message)
+
+    def parse(self, text=None, tokens=None, tasks=None, skip_tasks=None, language=None):
+        return self._post('/parse', {"text": text, "tokens": tokens, "tasks": tasks,
+                                     "skip_tasks": skip_tasks, "language": language or self._language})
+
+    __call__ = parse
+
+    def parse_sentences(self, sentences, tasks='dep'):
+        # 按 batch_size 打包，多批并发发送，结果按原顺序拼回一份文档
+        batches = [sentences[i:i + self.batch_size] for i in range(0, len(sentences), self.batch_size)]
+        if len(batches) <= 1:
+            docs = [self.parse(batch, tasks=tasks) for batch in batches]
+        else:
+            docs = list(self._executor.map(lambda batch: self.parse(batch, tasks=tasks), batches))
+        merged = {}
+        for doc in docs:
+            for task, value in doc.items():
+                merged.setdefault(task, []).extend(value)
+        return merged
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
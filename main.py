@@ -1,74 +1,284 @@
+import startup_trace  # 最先导入：以它的导入时刻作为启动计时起点
 import sys
 import json
+import os
+import time
+import threading
+import importlib
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                                QHBoxLayout, QLabel, QLineEdit, QPushButton,
-                               QComboBox, QMessageBox, QProgressBar, QFrame,QListView)
-from PySide6.QtWebEngineWidgets import QWebEngineView
-from PySide6.QtCore import Qt, QThread, Signal
+                               QComboBox, QMessageBox, QProgressBar, QFrame,QListView,
+                               QStackedWidget, QCheckBox, QFileDialog, QSpinBox)
+from PySide6.QtCore import Qt, QThread, Signal, QTimer, QEvent, QObject
 from PySide6.QtGui import QFont, QIcon
 
+startup_trace.mark("import Qt")
+
+# QtWebEngine 和 NumPy 都不在这里导入：窗口先出来，重模块在首帧之后再加载
+import pipelines
+import web_assets
+import compare
+from parse_cache import cache
+from parsing import HANLP_KEY, AnalysisCancelled, hanlp_auth, parse_text, parse_many
+from timing import StageTimer, stage, timing_log
+
+startup_trace.mark("import app modules")
+
+# 首帧之后在后台预先导入的模块
+PRELOAD_MODULES = ('metrics',)
+# 浏览树库时每页的句数
+TREEBANK_PAGE = 10
+
+
+def preload_modules(names=PRELOAD_MODULES):
+    def _run():
+        for name in names:
+            with startup_trace.span(f"preload {name}"):
+                importlib.import_module(name)
+
+    t = threading.Thread(target=_run, name="preload", daemon=True)
+    t.start()
+    return t
+
 
 # ================= 1. 后端分析线程 (保持不变) =================
 class AnalysisThread(QThread):
     finished = Signal(object)
     error = Signal(str)
+    cancelled = Signal()
 
-    def __init__(self, text, model_name, hanlp_key):
+    def __init__(self, text, model_name, hanlp_key, timer=None, cancel=None):
         super().__init__()
         self.text = text
         self.model_name = model_name
         self.hanlp_key = hanlp_key
+        self.timer = timer
+        self.cancel = cancel
+
+    def run(self):
+        try:
+            if compare.is_compare(self.model_name):
+                # 对比模式：各内核并行分析(各自读写缓存)，结果是 compare.run_compare 的字典
+                data = compare.run_compare(self.text, compare.backends_of(self.model_name), self.hanlp_key,
+                                           self.timer, self.cancel, cache)
+            else:
+                data = parse_text(self.text, self.model_name, self.hanlp_key, self.timer, self.cancel)
+            # 被取消时结果照样写缓存(下次同样的输入直接命中)，只是不再交给界面
+            if data and not isinstance(data, dict):
+                with stage(self.timer, 'cache.put'):
+                    cache.put(self.text, pipelines.backend_of(self.model_name), data)
+            if self.cancel is not None and self.cancel.is_set():
+                self.cancelled.emit()
+            else:
+                self.finished.emit(data)
+
+        except AnalysisCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.error.emit(str(e))
+
+
+class CorpusThread(QThread):
+    # 逐块分析一个文本文件(每行一句)，统计量常驻内存、大小固定，每隔 every 秒把累计结果推给界面
+    progress = Signal(object)
+    error = Signal(str)
+
+    def __init__(self, path, model_name, hanlp_key, cancel, chunk_size=64, every=0.5):
+        super().__init__()
+        self.path = path
+        self.model_name = model_name
+        self.hanlp_key = hanlp_key
+        self.cancel = cancel
+        self.chunk_size = chunk_size
+        self.every = every
+
+    def run(self):
+        from batch import read_chunks
+        from corpus_stats import CorpusStats
+        stats = CorpusStats()
+        size = max(1, os.path.getsize(self.path))
+        consumed = 0
+        completed = False
+        last = time.perf_counter()
+
+        def report(done, cancelled=False):
+            r = stats.report()
+            r.update(source=os.path.basename(self.path), progress=1.0 if done else min(1.0, consumed / size),
+                     done=done, cancelled=cancelled)
+            self.progress.emit(r)
+
+        try:
+            with open(self.path, encoding='utf-8', errors='replace') as f:
+                for chunk in read_chunks(f, self.chunk_size):
+                    if self.cancel.is_set():
+                        break
+                    texts = [text for _, text in chunk]
+                    consumed += sum(len(text.encode('utf-8')) + 1 for text in texts)
+                    try:
+                        parsed = parse_many(texts, self.model_name, self.hanlp_key)
+                    except Exception:
+                        stats.errors += len(texts)
+                        continue
+                    stats.update([data for sentences in parsed for data in sentences])
+                    if time.perf_counter() - last >= self.every:
+                        last = time.perf_counter()
+                        report(False)
+                else:
+                    completed = True
+            # 中途取消时如实报告读到哪里，页面显示 "已取消"
+            report(completed, cancelled=not completed)
+        except Exception as e:
+            self.error.emit(str(e))
+
+
+class TreebankThread(QThread):
+    # 打开树库；第一次打开大文件时要扫描一遍建索引，放到后台
+    loaded = Signal(object)
+    error = Signal(str)
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
 
     def run(self):
         try:
-            data = None
-            # --- HanLP 分支 ---
-            if "HanLP" in self.model_name:
-                from hanlp_restful import HanLPClient
-                auth = self.hanlp_key if self.hanlp_key and "粘贴" not in self.hanlp_key else None
-                client = HanLPClient('https://www.hanlp.com/api', auth=auth, language='zh')
-                doc = client(self.text, tasks='dep')
-
-                tokens = doc.get('tok/fine', doc.get('tok', []))
-                pos = doc.get('pos/ctb', doc.get('pos/pku', doc.get('pos', [])))
-                dep = doc.get('dep', [])
-
-                if tokens and isinstance(tokens[0], list): tokens = tokens[0]
-                if pos and isinstance(pos[0], list): pos = pos[0]
-                if dep and isinstance(dep[0], list): dep = dep[0]
-
-                data = []
-                for i in range(len(tokens)):
-                    data.append(
-                        {"id": i + 1, "text": tokens[i], "pos": pos[i] if i < len(pos) else "X", "head": dep[i][0],
-                         "rel": dep[i][1], "out_degree": 0})
-
-            # --- Stanza 分支 ---
-            elif "Stanza" in self.model_name:
-                import stanza
-                # 自动下载模型
-                stanza.download('zh', verbose=False)
-                nlp = stanza.Pipeline('zh', processors='tokenize,pos,lemma,depparse', verbose=False)
-                doc = nlp(self.text)
-                sent = doc.sentences[0]
-                data = []
-                for word in sent.words:
-                    data.append(
-                        {"id": word.id, "text": word.text, "pos": word.upos, "head": word.head, "rel": word.deprel,
-                         "out_degree": 0})
-
-            # 计算出度
-            if data:
-                for word in data:
-                    if word['head'] > 0 and word['head'] <= len(data):
-                        data[word['head'] - 1]['out_degree'] += 1
-
-            self.finished.emit(data)
+            from treebank import Treebank
+            self.loaded.emit(Treebank(self.path))
+        except Exception as e:
+            self.error.emit(str(e))
+
 
+class SearchThread(QThread):
+    # 在树库上做结构检索；索引第一次建好后交回界面复用，命中结果分批推送
+    ready = Signal(object)
+    found = Signal(object)
+    done = Signal(int, int)
+    error = Signal(str)
+
+    def __init__(self, path, query, cancel, index=None, first_batch=TREEBANK_PAGE, every=0.3):
+        super().__init__()
+        self.path = path
+        self.query = query
+        self.cancel = cancel
+        self.index = index
+        self.first_batch = first_batch
+        self.every = every
+
+    def run(self):
+        try:
+            from search import SearchIndex, open_corpus, parse_query
+            node = parse_query(self.query)
+            if self.index is None:
+                # 转换树库、建索引都会在步骤之间检查取消
+                self.index = SearchIndex(open_corpus(self.path, self.cancel), self.cancel)
+                self.ready.emit(self.index)
+            batch, hits, sentences = [], 0, 0
+            last = time.perf_counter()
+            for hit in self.index.search(node, cancel=self.cancel):
+                if self.cancel.is_set():
+                    return
+                batch.append(hit)
+                hits += len(hit[1])
+                sentences += 1
+                # 第一页凑够就先送出去，之后按时间间隔批量送
+                if sentences == self.first_batch or time.perf_counter() - last >= self.every:
+                    self.found.emit(batch)
+                    batch, last = [], time.perf_counter()
+            if batch:
+                self.found.emit(batch)
+            self.done.emit(hits, sentences)
+        except AnalysisCancelled:
+            pass
         except Exception as e:
             self.error.emit(str(e))
 
 
+class AnalysisScheduler(QObject):
+    # 同一时刻最多一个分析线程在跑，外加一个排队的请求：
+    #   每次提交分配递增的代号，过时代号的结果直接丢弃；
+    #   新提交会取消在跑的线程(在阶段边界退出)，并顶替还没开始的排队请求；
+    #   debounce=True 的提交先等一小段时间，连续输入只会合并成最后一次。
+    result = Signal(int, object, object)  # 代号, 句子列表, 计时器
+    failed = Signal(int, str, object)
+    busy = Signal(bool)
+
+    def __init__(self, debounce_ms=350, parent=None):
+        super().__init__(parent)
+        self.generation = 0
+        self.debounce_ms = debounce_ms
+        self._pending = None
+        self._thread = None
+        self._cancel = None
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.timeout.connect(self._dispatch)
+
+    def submit(self, text, model_name, hanlp_key, timer=None, debounce=False):
+        self.generation += 1
+        self._pending = (self.generation, text, model_name, hanlp_key, timer)
+        if self._cancel is not None:
+            self._cancel.set()
+        if debounce:
+            self._debounce.start(self.debounce_ms)
+        else:
+            self._debounce.stop()
+            self._dispatch()
+        self.busy.emit(True)
+        return self.generation
+
+    def cancel(self):
+        # 作废所有在跑和排队的请求(例如命中缓存后直接渲染了新结果)
+        self.generation += 1
+        self._pending = None
+        self._debounce.stop()
+        if self._cancel is not None:
+            self._cancel.set()
+        self.busy.emit(self._thread is not None)
+
+    def is_busy(self):
+        return self._thread is not None or self._pending is not None
+
+    def _dispatch(self):
+        # 线程还在跑(包括正在响应取消)时先不启动新线程，它结束后会回来取最新的排队请求
+        if self._pending is None or self._thread is not None:
+            return
+        generation, text, model_name, hanlp_key, timer = self._pending
+        self._pending = None
+        self._cancel = threading.Event()
+        thread = self._thread = AnalysisThread(text, model_name, hanlp_key, timer, self._cancel)
+        thread.finished.connect(lambda data: self._on_done(thread, generation, data, None, timer))
+        thread.error.connect(lambda msg: self._on_done(thread, generation, None, msg, timer))
+        thread.cancelled.connect(lambda: self._on_done(thread, generation, None, None, timer))
+        thread.start()
+
+    def _on_done(self, thread, generation, data, error, timer):
+        # 信号是 run() 的最后一步，wait 只是等线程真正退出
+        thread.wait()
+        self._thread = self._cancel = None
+        current = generation == self.generation
+        if current and error is not None:
+            self.failed.emit(generation, error, timer)
+        elif current and data is not None:
+            self.result.emit(generation, data, timer)
+        self._dispatch()
+        if not self.is_busy():
+            self.busy.emit(False)
+
+
+def to_page_json(sentences):
+    # 每句压缩成按列存放的数组 [词, 词性, 中心词, 关系, 出度, 依存距离, 句级指标]，id 即下标 + 1
+    # 指标在 Python 端批量算好，页面只负责展示
+    import metrics
+    result = metrics.compute(sentences)
+    offsets = result['offsets'].tolist()
+    distance = result['distance'].tolist()
+    compact = [[[w['text'] for w in data], [w['pos'] for w in data], [w['head'] for w in data],
+                [w['rel'] for w in data], [w['out_degree'] for w in data],
+                distance[offsets[k]:offsets[k + 1]], metrics.sentence_summary(result, k)]
+               for k, data in enumerate(sentences)]
+    return json.dumps(compact, ensure_ascii=False)
+
+
 # ================= 2. 主窗口界面 (全面美化) =================
 # ================= 2. 主窗口界面 (优化输入框尺寸) =================
 class MainWindow(QMainWindow):
@@ -111,7 +321,8 @@ class MainWindow(QMainWindow):
         label_model.setStyleSheet("font-size: 16px; font-weight: bold; color: #374151; border: none;")
 
         self.combo_model = QComboBox()
-        self.combo_model.addItems(["HanLP (云端API)", "Stanza (学术标准)"])
+        self.combo_model.addItems(["HanLP (云端API)", "Stanza (学术标准)", "对比 (HanLP + Stanza)"])
+        self.combo_model.currentTextChanged.connect(self.warmup_backend)
         self.combo_model.setFixedWidth(220)  # 稍微加宽一点
         self.combo_model.setFixedHeight(45)  # 主按钮高度
 
@@ -204,16 +415,109 @@ class MainWindow(QMainWindow):
             QPushButton:pressed { background-color: #1e40af; }
             QPushButton:disabled { background-color: #9ca3af; }
         """)
-        self.btn_run.clicked.connect(self.start_analysis)
+        self.btn_run.clicked.connect(lambda: self.start_analysis())
+
+        # 语料统计：选择一个每行一句的文本文件，边分析边更新分布图
+        self.btn_corpus = QPushButton("语料…")
+        self.btn_corpus.setFixedHeight(45)
+        self.btn_corpus.setCursor(Qt.PointingHandCursor)
+        self.btn_corpus.setStyleSheet("""
+            QPushButton {
+                background-color: #ffffff; color: #374151; font-size: 15px; font-weight: bold;
+                border: 2px solid #e5e7eb; border-radius: 10px; padding: 0 16px;
+            }
+            QPushButton:hover { border-color: #d1d5db; }
+        """)
+        self.btn_corpus.clicked.connect(self.toggle_corpus)
+        self.corpus_thread = None
+        self.corpus_cancel = None
+
+        # 树库浏览：打开 CoNLL-U 文件，按句号跳转或翻页
+        self.btn_treebank = QPushButton("树库…")
+        self.btn_treebank.setFixedHeight(45)
+        self.btn_treebank.setCursor(Qt.PointingHandCursor)
+        self.btn_treebank.setStyleSheet(self.btn_corpus.styleSheet())
+        self.btn_treebank.clicked.connect(self.open_treebank)
+        self.treebank = None
+        self.treebank_thread = None
+        # 结构检索：search_hits 不为 None 时翻页条翻的是检索结果
+        self.search_index = None
+        self.search_hits = None
+        self.search_thread = None
+        self.search_cancel = None
+        # 已取消、还没退出的检索线程，退出前保持引用
+        self.retired_searches = set()
+
+        # 4. 实时分析：勾选后边输入边分析，连续输入会合并成一次
+        self.check_live = QCheckBox("实时")
+        self.check_live.setCursor(Qt.PointingHandCursor)
+        self.check_live.setStyleSheet("font-size: 15px; color: #374151; border: none;")
+        self.check_live.toggled.connect(self.on_live_toggled)
+        self.input_text.textChanged.connect(self.on_text_edited)
+        self.combo_model.currentTextChanged.connect(self.on_text_edited)
+
+        # 分析请求统一交给调度器：可取消、过时结果自动丢弃
+        self.scheduler = AnalysisScheduler(parent=self)
+        self.scheduler.result.connect(lambda generation, data, timer: self.on_result(data, timer))
+        self.scheduler.failed.connect(lambda generation, msg, timer: self.on_error(msg, timer))
+        self.scheduler.busy.connect(self.set_busy)
 
         # 添加到布局
         control_layout.addWidget(label_model)
         control_layout.addWidget(self.combo_model)
         control_layout.addWidget(self.input_text, 1)  # 参数 1 保证它占满剩余空间
+        control_layout.addWidget(self.check_live)
         control_layout.addWidget(self.btn_run)
+        control_layout.addWidget(self.btn_corpus)
+        control_layout.addWidget(self.btn_treebank)
 
         main_layout.addWidget(control_card)
 
+        # --- 树库翻页条 (打开树库后才显示) ---
+        self.treebank_bar = QFrame()
+        self.treebank_bar.setStyleSheet("""
+            QFrame { background-color: #ffffff; border-radius: 12px; border: 1px solid #e5e7eb; }
+            QLabel { border: none; font-size: 14px; color: #374151; }
+            QPushButton {
+                background-color: #f9fafb; color: #374151; font-size: 14px; font-weight: bold;
+                border: 1px solid #e5e7eb; border-radius: 8px; padding: 4px 14px;
+            }
+            QPushButton:hover { border-color: #d1d5db; }
+            QSpinBox { font-size: 14px; padding: 4px 8px; border: 1px solid #e5e7eb; border-radius: 8px; }
+        """)
+        bar_layout = QHBoxLayout(self.treebank_bar)
+        bar_layout.setContentsMargins(20, 8, 20, 8)
+        self.label_treebank = QLabel()
+        self.btn_prev_page = QPushButton("◀ 上一页")
+        self.btn_prev_page.clicked.connect(lambda: self.show_treebank_page(self.spin_sentence.value() - TREEBANK_PAGE))
+        self.spin_sentence = QSpinBox()
+        self.spin_sentence.setMinimumWidth(110)
+        self.spin_sentence.setKeyboardTracking(False)  # 输完回车才跳转
+        self.spin_sentence.valueChanged.connect(self.show_treebank_page)
+        self.label_treebank_total = QLabel()
+        self.btn_next_page = QPushButton("下一页 ▶")
+        self.btn_next_page.clicked.connect(lambda: self.show_treebank_page(self.spin_sentence.value() + TREEBANK_PAGE))
+        btn_close_treebank = QPushButton("关闭")
+        btn_close_treebank.clicked.connect(self.close_treebank)
+        self.input_query = QLineEdit()
+        self.input_query.setPlaceholderText("结构检索，例: rel=nsubj & head.pos=VERB & dist>5")
+        self.input_query.setStyleSheet(
+            "QLineEdit { font-size: 14px; padding: 4px 10px; border: 1px solid #e5e7eb; border-radius: 8px; }")
+        self.input_query.returnPressed.connect(self.start_search)
+        btn_search = QPushButton("检索")
+        btn_search.clicked.connect(self.start_search)
+        bar_layout.addWidget(self.label_treebank)
+        bar_layout.addWidget(self.input_query, 1)
+        bar_layout.addWidget(btn_search)
+        bar_layout.addWidget(self.btn_prev_page)
+        bar_layout.addWidget(QLabel("第"))
+        bar_layout.addWidget(self.spin_sentence)
+        bar_layout.addWidget(self.label_treebank_total)
+        bar_layout.addWidget(self.btn_next_page)
+        bar_layout.addWidget(btn_close_treebank)
+        self.treebank_bar.hide()
+        main_layout.addWidget(self.treebank_bar)
+
         # --- 进度条 ---
         self.progress = QProgressBar()
         self.progress.setRange(0, 0)
@@ -224,340 +528,402 @@ class MainWindow(QMainWindow):
         main_layout.addWidget(self.progress)
 
         # --- 浏览器视图 ---
-        self.webview = QWebEngineView()
+        # QtWebEngine 的导入和初始化要几百毫秒，先放一个轻量占位，窗口画出第一帧后再创建
+        self.view_stack = QStackedWidget()
+        self.placeholder = QLabel("正在加载可视化组件…")
+        self.placeholder.setAlignment(Qt.AlignCenter)
+        self.placeholder.setStyleSheet("color: #9ca3af; font-size: 15px; background: transparent; border: none;")
+        self.placeholder.installEventFilter(self)
+        self.view_stack.addWidget(self.placeholder)
+        main_layout.addWidget(self.view_stack, 1)
+
+        # 页面只加载一次(内含欢迎页)，之后的结果通过 runJavaScript 推送进去
+        self.webview = None
+        self.page_ready = False
+        self.pending_payload = None
+
+        # 启动时在后台预热当前选中的内核(导入 + 加载都在后台线程)
+        self.warmup_backend(self.combo_model.currentText())
+        startup_trace.mark("MainWindow built")
+
+    def eventFilter(self, obj, event):
+        # 占位第一次绘制完成 = 窗口已经可见，此时再去初始化 WebEngine 和预导入 NumPy
+        if obj is self.placeholder and event.type() == QEvent.Paint:
+            self.placeholder.removeEventFilter(self)
+            startup_trace.mark("window painted")
+            QTimer.singleShot(0, self.init_webview)
+            preload_modules()
+        return super().eventFilter(obj, event)
+
+    def init_webview(self):
+        if self.webview is not None:
+            return
+        with startup_trace.span("import QtWebEngine"):
+            from PySide6.QtWebEngineWidgets import QWebEngineView
+        # 自定义协议要在创建第一个 WebEngine 对象之前注册
+        web_assets.register_scheme()
+        with startup_trace.span("create QWebEngineView"):
+            self.webview = QWebEngineView()
+        web_assets.install(self.webview.page().profile())
         self.webview.page().setBackgroundColor(Qt.transparent)
         self.webview.setStyleSheet("background: transparent; border: none;")
+        self.webview.loadFinished.connect(self.on_page_loaded)
+        self.webview.load(web_assets.page_url())
+        self.view_stack.addWidget(self.webview)
+
+    def warmup_backend(self, model):
+        # 对比模式下参与对比的内核都要预热，否则第一次对比要等还没加载的那个
+        if compare.is_compare(model):
+            backends = compare.backends_of(model)
+        else:
+            backends = ['hanlp'] if "HanLP" in model else ['stanza'] if "Stanza" in model else []
+        for backend in backends:
+            if backend == 'hanlp':
+                pipelines.manager.warmup('hanlp', auth=hanlp_auth(HANLP_KEY))
+            else:
+                pipelines.manager.warmup(backend)
+
+    def toggle_corpus(self):
+        if self.corpus_thread is not None:
+            self.corpus_cancel.set()
+            return
+        path, _ = QFileDialog.getOpenFileName(self, "选择语料(每行一句)", "", "文本文件 (*.txt);;所有文件 (*)")
+        if not path:
+            return
+        # 对比模式下语料统计只用第一个内核
+        model = self.combo_model.currentText()
+        if compare.is_compare(model):
+            model = compare.backends_of(model)[0]
+        self.corpus_cancel = threading.Event()
+        self.corpus_thread = CorpusThread(path, model, HANLP_KEY, self.corpus_cancel)
+        self.corpus_thread.progress.connect(self.on_corpus_progress)
+        self.corpus_thread.error.connect(self.on_error_message)
+        self.corpus_thread.finished.connect(self.on_corpus_finished)
+        self.btn_corpus.setText("停止")
+        self.corpus_thread.start()
+
+    def on_corpus_progress(self, report):
+        if self.page_ready:
+            self.webview.page().runJavaScript(f"showCorpusStats({json.dumps(report, ensure_ascii=False)});")
+        state = " · 已取消" if report.get('cancelled') else ""
+        self.statusBar().showMessage(f"语料统计: {report['sentences']} 句 · {report['progress'] * 100:.0f}%{state}")
+
+    def on_corpus_finished(self):
+        self.corpus_thread.wait()
+        self.corpus_thread = self.corpus_cancel = None
+        self.btn_corpus.setText("语料…")
+
+    def open_treebank(self):
+        if self.treebank_thread is not None:
+            return
+        path, _ = QFileDialog.getOpenFileName(self, "打开树库", "", "CoNLL-U (*.conllu *.conll);;所有文件 (*)")
+        if not path:
+            return
+        self.treebank_thread = TreebankThread(path)
+        self.treebank_thread.loaded.connect(self.on_treebank_loaded)
+        self.treebank_thread.error.connect(self.on_error_message)
+        self.treebank_thread.finished.connect(self.on_treebank_thread_finished)
+        self.btn_treebank.setEnabled(False)
+        self.statusBar().showMessage(f"正在打开树库 {os.path.basename(path)}…")
+        self.treebank_thread.start()
+
+    def on_treebank_thread_finished(self):
+        self.treebank_thread.wait()
+        self.treebank_thread = None
+        self.btn_treebank.setEnabled(True)
+
+    def on_treebank_loaded(self, treebank):
+        if self.treebank is not None:
+            self.treebank.close()
+        self.treebank = treebank
+        if not len(treebank):
+            self.close_treebank()
+            QMessageBox.warning(self, "提示", "树库里没有找到句子。")
+            return
+        self.scheduler.cancel()
+        self.check_live.setChecked(False)
+        self.stop_search()
+        self.search_index = None
+        self.search_hits = None
+        self.label_treebank.setText(os.path.basename(treebank.path))
+        self.treebank_bar.show()
+        self.show_treebank_page(1)
+
+    def page_total(self):
+        return len(self.search_hits) if self.search_hits is not None else len(self.treebank)
+
+    def update_page_range(self):
+        total = self.page_total()
+        if self.search_hits is None:
+            self.label_treebank_total.setText(f"句 / 共 {total} 句")
+        else:
+            state = " · 检索中…" if self.search_thread is not None else ""
+            self.label_treebank_total.setText(f"条 / 命中 {total} 句{state}")
+        self.spin_sentence.blockSignals(True)
+        self.spin_sentence.setRange(min(1, total), max(1, total))
+        self.spin_sentence.blockSignals(False)
+        first = self.spin_sentence.value()
+        self.btn_prev_page.setEnabled(first > 1)
+        self.btn_next_page.setEnabled(first + TREEBANK_PAGE <= total)
+
+    def show_treebank_page(self, first):
+        # first 从 1 开始；浏览时是树库句号，检索时是第几条结果
+        if self.treebank is None:
+            return
+        total = self.page_total()
+        first = max(1, min(first, total))
+        if self.spin_sentence.value() != first:
+            self.spin_sentence.blockSignals(True)
+            self.spin_sentence.setValue(first)
+            self.spin_sentence.blockSignals(False)
+        self.update_page_range()
+        if not total:
+            return
 
-        # 初始页 HTML (略...)
-        # 这里你可以保留之前的 welcome_html 代码，不用变
-
-        # 初始欢迎页
-        welcome_html = """
-        <!DOCTYPE html>
-        <html>
-        <head>
-        <style>
-            body { 
-                font-family: 'Segoe UI', Roboto, sans-serif; 
-                display: flex; justify-content: center; align-items: center; 
-                height: 100vh; margin: 0; color: #4b5563; 
-            }
-            .welcome-container {
-                text-align: center; padding: 40px;
-                background: #ffffff; border-radius: 16px;
-                box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.05);
-                border: 1px solid #e5e7eb;
-            }
-            h1 { color: #111827; margin-bottom: 10px; }
-            p { font-size: 1.1rem; color: #6b7280; }
-        </style>
-        </head>
-        <body>
-            <div class="welcome-container">
-                <h1>欢迎使用句法分析实验室</h1>
-                <p>请在上方输入句子，选择模型后点击“开始分析”。</p>
-            </div>
-        </body>
-        </html>
-        """
-        self.webview.setHtml(welcome_html)
-        main_layout.addWidget(self.webview, 1)
-
-    def start_analysis(self):
-        text = self.input_text.text()
-        if not text.strip():
-            QMessageBox.warning(self, "提示", "请输入句子")
+        timer = StageTimer()
+        timer.info.update(backend='treebank', first=first)
+        try:
+            with timer.stage('treebank.read'):
+                if self.search_hits is None:
+                    numbers, sentences = self.treebank.page(first - 1, TREEBANK_PAGE)
+                    marks = None
+                else:
+                    hits = self.search_hits[first - 1:first - 1 + TREEBANK_PAGE]
+                    sentences = [self.search_index.cols.sentence(k) for k, _, _ in hits]
+                    numbers = [k + 1 for k, _, _ in hits]
+                    marks = [marked for _, _, marked in hits]
+        except Exception as e:
+            self.on_error_message(str(e))
             return
+        self.on_success(sentences, timer, numbers, marks)
 
-        model = self.combo_model.currentText()
+    def start_search(self):
+        if self.treebank is None:
+            return
+        self.stop_search()
+        query = self.input_query.text().strip()
+        if not query:
+            # 清空查询 = 回到逐句浏览
+            self.search_hits = None
+            self.show_treebank_page(1)
+            return
+        from search import QueryError, parse_query
+        try:
+            parse_query(query)
+        except QueryError as e:
+            QMessageBox.warning(self, "查询有误", str(e))
+            return
+        self.search_hits = []
+        self.search_cancel = threading.Event()
+        self.search_thread = SearchThread(self.treebank.path, query, self.search_cancel, self.search_index)
+        self.search_thread.ready.connect(self.on_search_ready)
+        self.search_thread.found.connect(self.on_search_found)
+        self.search_thread.done.connect(self.on_search_done)
+        self.search_thread.error.connect(self.on_search_error)
+        self.search_thread.finished.connect(self.on_search_finished)
+        if self.search_index is None:
+            self.statusBar().showMessage("正在建立检索索引…")
+        self.update_page_range()
+        self.search_thread.start()
+
+    def stop_search(self):
+        # 不在界面线程里等：旧线程收到取消后自己退出，它发出的信号都按 sender 丢弃
+        if self.search_thread is not None:
+            self.search_cancel.set()
+            thread = self.search_thread
+            self.retired_searches.add(thread)
+            thread.finished.connect(lambda: self.retired_searches.discard(thread))
+            thread.finished.connect(thread.deleteLater)
+            self.search_thread = self.search_cancel = None
+
+    def on_search_ready(self, index):
+        if self.sender() is self.search_thread:
+            self.search_index = index
+
+    def on_search_found(self, batch):
+        if self.search_hits is None or self.sender() is not self.search_thread:
+            return
+        shown = len(self.search_hits)
+        self.search_hits.extend(batch)
+        # 当前页还没排满时把新结果补上去，否则只更新计数
+        first = self.spin_sentence.value()
+        if shown < first - 1 + TREEBANK_PAGE:
+            self.show_treebank_page(first)
+        else:
+            self.update_page_range()
+
+    def on_search_done(self, hits, sentences):
+        if self.sender() is self.search_thread:
+            self.statusBar().showMessage(f"检索完成: {hits} 处 / {sentences} 句")
+
+    def on_search_error(self, err_msg):
+        if self.sender() is self.search_thread:
+            self.on_error_message(err_msg)
+
+    def on_search_finished(self):
+        if self.sender() is not self.search_thread:
+            return
+        self.search_thread.wait()
+        self.search_thread = self.search_cancel = None
+        if self.search_hits is not None:
+            self.update_page_range()
+
+    def close_treebank(self):
+        self.stop_search()
+        self.search_index = self.search_hits = None
+        if self.treebank is not None:
+            self.treebank.close()
+        self.treebank = None
+        self.treebank_bar.hide()
+
+    def on_error_message(self, err_msg):
+        QMessageBox.critical(self, "错误", f"分析过程中发生错误:\n{err_msg}")
 
-        # 👇👇👇 你的 HanLP Key 填在这里 👇👇👇
-        hanlp_key = "OTUxOUBiYnMuaGFubHAuY29tOk9OTFE1N0V6SlJUT3dwVXE="
+    def on_live_toggled(self, checked):
+        if checked:
+            self.on_text_edited()
 
-        self.btn_run.setEnabled(False)
-        self.btn_run.setText("analyzing...")
-        self.progress.show()
+    def on_text_edited(self, *_):
+        if self.check_live.isChecked() and self.input_text.text().strip():
+            self.start_analysis(live=True)
 
-        self.thread = AnalysisThread(text, model, hanlp_key)
-        self.thread.finished.connect(self.on_success)
-        self.thread.error.connect(self.on_error)
-        self.thread.start()
+    def set_busy(self, busy):
+        # 调度器随时接受新请求，按钮不再禁用；再次点击会取消正在进行的分析
+        self.btn_run.setText("analyzing..." if busy else "开始")
+        self.progress.setVisible(busy)
 
-    def on_success(self, data):
-        self.btn_run.setEnabled(True)
-        self.btn_run.setText("开始")
-        self.progress.hide()
+    def start_analysis(self, live=False):
+        text = self.input_text.text()
+        if not text.strip():
+            if not live:
+                QMessageBox.warning(self, "提示", "请输入句子")
+            return
 
-        if not data:
-            QMessageBox.warning(self, "提示", "分析未返回数据，请检查输入。")
+        model = self.combo_model.currentText()
+        startup_trace.mark("first parse requested", once=True)
+
+        # 从点击到页面渲染完的每个阶段都记在这次分析的计时器上
+        backend = 'compare' if compare.is_compare(model) else pipelines.backend_of(model)
+        timer = StageTimer()
+        timer.info.update(backend=backend, chars=len(text), live=live)
+        if backend == 'compare':
+            # 对比模式在分析线程里逐个内核查缓存
+            self.scheduler.submit(text, model, HANLP_KEY, timer, debounce=live)
             return
 
-        json_str = json.dumps(data)
-        html_content = self.get_html_template(json_str)
-        self.webview.setHtml(html_content)
+        # 命中缓存时直接渲染，同时作废还在进行的旧请求
+        with timer.stage('cache.get'):
+            cached = cache.get(text, backend)
+        timer.info['cache_hit'] = cached is not None
+        if cached is not None:
+            self.scheduler.cancel()
+            self.on_success(cached, timer)
+            return
 
-    def on_error(self, err_msg):
-        self.btn_run.setEnabled(True)
-        self.btn_run.setText("开始")
-        self.progress.hide()
+        self.scheduler.submit(text, model, HANLP_KEY, timer, debounce=live)
+
+    def on_result(self, data, timer):
+        if isinstance(data, dict):
+            self.on_compare(data, timer)
+        else:
+            self.on_success(data, timer)
+
+    def on_compare(self, result, timer):
+        # 两边句数相同时逐句交替排列(HanLP #1, Stanza #1, HanLP #2 ...)，否则各自整段依次排列
+        backends = result["backends"]
+        parses, marks = result["parses"], result["marks"]
+        counts = {len(parses[b]) for b in backends}
+        if len(counts) == 1:
+            order = [(b, k) for k in range(counts.pop()) for b in backends]
+        else:
+            order = [(b, k) for b in backends for k in range(len(parses[b]))]
+        order = [(b, k) for b, k in order if parses[b][k]]
+        sentences = [parses[b][k] for b, k in order]
+        labels = [f"{compare.DISPLAY_NAMES.get(b, b)} · #{k + 1}" for b, k in order]
+        timer.info.update(backends_ms={b: round(sec * 1000, 2) for b, sec in result["seconds"].items()})
+        summary = {"pairs": result["pairs"], "seconds": result["seconds"], "names": compare.DISPLAY_NAMES}
+        self.on_success(sentences, timer, labels, [marks[b][k] for b, k in order], summary)
+
+    def on_success(self, sentences, timer, first=1, marks=None, comparison=None):
+        if not sentences:
+            if not timer.info.get('live'):
+                QMessageBox.warning(self, "提示", "分析未返回数据，请检查输入。")
+            return
+
+        startup_trace.mark("first parse done", once=True)
+        stats = cache.stats()
+        self.statusBar().showMessage(f"缓存 命中 {stats['hits']} / 未命中 {stats['misses']} · {stats['entries']} 条")
+
+        timer.info.update(sentences=len(sentences), tokens=sum(len(data) for data in sentences))
+        with timer.stage('shape'):
+            payload = to_page_json(sentences)
+        self.push_result(payload, timer, first, marks, comparison)
+
+    def on_page_loaded(self, ok):
+        self.page_ready = ok
+        if ok:
+            # 页面就绪后才把占位换成真正的视图，避免露出空白
+            self.view_stack.setCurrentWidget(self.webview)
+            if startup_trace.mark("page loaded", once=True):
+                startup_trace.report("time to window")
+        if ok and self.pending_payload is not None:
+            (payload, timer, first, marks, comparison), self.pending_payload = self.pending_payload, None
+            self.push_result(payload, timer, first, marks, comparison)
+
+    def push_result(self, payload, timer=None, first=1, marks=None, comparison=None):
+        # 页面还没加载完时只保留最新的一份结果
+        # first 是第一句的句号(浏览树库时不从 1 开始，检索结果是句号列表，对比模式是 "内核 · #句号")
+        # marks 是每句要高亮的弧，comparison 是对比模式的一致率摘要
+        if not self.page_ready:
+            self.pending_payload = (payload, timer, first, marks, comparison)
+            return
+        # showParse 返回页面内同步渲染的毫秒数；其余往返时间记为 render.ipc
+        sent_at = time.perf_counter()
+        args = ", ".join([payload] + [json.dumps(v, ensure_ascii=False) for v in (first, marks, comparison)])
+        self.webview.page().runJavaScript(f"showParse({args});",
+                                          lambda result: self.on_rendered(result, timer, sent_at))
+
+    def on_rendered(self, js_ms, timer, sent_at):
+        if startup_trace.mark("first render", once=True):
+            startup_trace.report("time to first parse")
+        if timer is None:
+            return
+        roundtrip = time.perf_counter() - sent_at
+        js = (js_ms or 0) / 1000
+        timer.add('render.js', js)
+        timer.add('render.ipc', max(0.0, roundtrip - js))
+        self.report_timing(timer)
+
+    def report_timing(self, timer, **info):
+        event = timing_log.record(timer, **info)
+        payload = json.dumps({"event": event, "rolling": timing_log.rolling()}, ensure_ascii=False)
+        if self.page_ready:
+            self.webview.page().runJavaScript(f"updateLatency({payload});")
+
+    def on_error(self, err_msg, timer):
+        self.report_timing(timer, error=err_msg)
+        # 实时模式下输入到一半出错很常见，只在状态栏提示，不弹窗打断输入
+        if timer.info.get('live'):
+            self.statusBar().showMessage(f"分析失败: {err_msg}")
+            return
         QMessageBox.critical(self, "错误", f"分析过程中发生错误:\n{err_msg}")
 
-    def get_html_template(self, json_data):
-        # 使用了 v3.0 风格的现代化 CSS
-        return f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-        <style>
-            @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&family=Noto+Serif+SC:wght@700&display=swap');
-
-            body {{ 
-                font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif; 
-                margin: 0; padding: 0; 
-                background-color: transparent; /* 让 Qt 窗口背景透过来 */
-            }}
-
-            .container {{
-                display: flex; flex-direction: column; gap: 24px;
-            }}
-
-            /* 通用卡片样式 */
-            .card {{
-                background: #ffffff;
-                border-radius: 16px;
-                box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.05), 0 2px 4px -1px rgba(0, 0, 0, 0.03);
-                border: 1px solid #e5e7eb;
-                padding: 24px;
-            }}
-
-            /* 可视化区域 */
-            .viz-wrapper {{ 
-                width: 100%; height: 360px; position: relative; 
-                margin: 0 auto; user-select: none; overflow: visible;
-            }}
-            .words-row {{ 
-                display: flex; justify-content: space-between; align-items: flex-end; 
-                padding: 0 60px; position: absolute; bottom: 0; 
-                width: 100%; box-sizing: border-box; height: 70px; 
-            }}
-            .word-block {{ 
-                display: flex; flex-direction: column; align-items: center; 
-                min-width: 50px; cursor: pointer; z-index: 10; transition: transform 0.2s;
-            }}
-            .word-block:hover {{ transform: translateY(-3px); }}
-            .word-text {{ 
-                font-size: 24px; color: #111827; margin-bottom: 8px; 
-                font-family: 'Noto Serif SC', serif; font-weight: 700; 
-            }}
-            .word-pos {{ 
-                font-size: 12px; color: #4b5563; background: #f3f4f6; 
-                border: 1px solid #e5e7eb; padding: 3px 10px; border-radius: 14px; 
-                font-weight: 600; text-transform: uppercase; letter-spacing: 0.5px;
-            }}
-
-            /* KPI 仪表盘 */
-            .dashboard-grid {{
-                display: grid; grid-template-columns: repeat(3, 1fr); gap: 20px;
-            }}
-            .kpi-card {{
-                background: #f9fafb; border: 1px solid #e5e7eb; border-radius: 12px;
-                padding: 20px; text-align: center; transition: all 0.2s;
-            }}
-            .kpi-card:hover {{ background: #fff; border-color: #c7d2fe; box-shadow: 0 4px 12px rgba(37, 99, 235, 0.1); }}
-            .kpi-val {{ font-size: 32px; font-weight: 800; color: #111827; display: block; margin-bottom: 4px; line-height: 1; }}
-            .kpi-label {{ font-size: 13px; color: #6b7280; text-transform: uppercase; font-weight: 700; letter-spacing: 0.05em; }}
-
-            /* 表格样式 */
-            .table-wrapper {{ overflow-x: auto; }}
-            table {{ width: 100%; border-collapse: separate; border-spacing: 0; font-size: 14px; color: #374151; }}
-            th {{ 
-                text-align: left; padding: 12px 16px; font-weight: 600; 
-                color: #4b5563; text-transform: uppercase; font-size: 12px; 
-                background: #f9fafb; border-bottom: 2px solid #e5e7eb; 
-                border-top: 1px solid #f3f4f6;
-            }}
-            th:first-child {{ border-top-left-radius: 8px; border-left: 1px solid #f3f4f6; }}
-            th:last-child {{ border-top-right-radius: 8px; border-right: 1px solid #f3f4f6; }}
-            td {{ padding: 14px 16px; border-bottom: 1px solid #f3f4f6; background: #fff; transition: background 0.15s; }}
-            tr:last-child td {{ border-bottom: none; }}
-            tr:last-child td:first-child {{ border-bottom-left-radius: 8px; }}
-            tr:last-child td:last-child {{ border-bottom-right-radius: 8px; }}
-            tr:hover td {{ background: #f8fafc; }}
-            .pos-tag {{
-                background: #eff6ff; color: #1d4ed8; padding: 3px 8px; 
-                border-radius: 6px; font-size: 12px; font-weight: 600; border: 1px solid #dbeafe;
-            }}
-
-            /* SVG 样式 */
-            svg {{ width: 100%; height: 100%; position: absolute; top: 0; left: 0; pointer-events: none; }}
-            path {{ 
-                fill: none; stroke: #9ca3af; stroke-width: 1.5px; 
-                pointer-events: stroke; transition: all 0.3s; cursor: pointer;
-            }}
-            .root-arc {{ stroke-dasharray: 4, 4; stroke: #d1d5db; }}
-            text.dep-label {{ 
-                font-size: 13px; fill: #4b5563; text-anchor: middle; font-family: 'Inter', sans-serif; 
-                pointer-events: all; cursor: pointer; font-weight: 600;
-                paint-order: stroke; stroke: white; stroke-width: 6px; stroke-linecap: round; stroke-linejoin: round;
-            }}
-
-            /* 高亮交互 */
-            .hover-mode .word-block, .hover-mode path, .hover-mode text {{ opacity: 0.2; transition: opacity 0.2s; }}
-            .hover-mode .highlighted {{ opacity: 1 !important; }}
-            .hover-mode path.highlighted {{ stroke: #2563eb; stroke-width: 2.5px; }}
-            .hover-mode text.highlighted {{ fill: #2563eb; font-weight: 700; }}
-            .hover-mode .word-text.highlighted {{ color: #2563eb; }}
-            .hover-mode .word-pos.highlighted {{ background: #dbeafe; color: #1e40af; border-color: #bfdbfe; }}
-        </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="card" style="padding-bottom: 0;">
-                    <div class="viz-wrapper" id="canvas-area">
-                        <div class="words-row" id="words-row"></div>
-                    </div>
-                </div>
-
-                <div class="card">
-                    <div id="stats-section"></div>
-                </div>
-            </div>
-
-            <script>
-                const data = {json_data};
-                const container = document.getElementById('canvas-area');
-                const wordsRow = document.getElementById('words-row');
-
-                function render() {{
-                    const wordEls = [];
-                    data.forEach(w => {{
-                        const el = document.createElement('div'); el.className = 'word-block'; el.id = 'w-'+w.id;
-                        el.innerHTML = `<div class="word-text">${{w.text}}</div><div class="word-pos" id="pos-${{w.id}}">${{w.pos}}</div>`;
-                        el.onmouseenter = () => highlight(w.id); el.onmouseleave = clearH;
-                        wordsRow.appendChild(el); wordEls.push(el);
-                    }});
-
-                    setTimeout(() => {{
-                        const svg = document.createElementNS("http://www.w3.org/2000/svg", "svg");
-                        const defs = document.createElementNS("http://www.w3.org/2000/svg", "defs");
-                        const marker = document.createElementNS("http://www.w3.org/2000/svg", "marker");
-                        marker.setAttribute("id", "arrow"); marker.setAttribute("markerWidth", "10"); marker.setAttribute("markerHeight", "10");
-                        marker.setAttribute("refX", "8"); marker.setAttribute("refY", "3"); marker.setAttribute("orient", "auto");
-                        const mPath = document.createElementNS("http://www.w3.org/2000/svg", "path");
-                        mPath.setAttribute("d", "M0,0 L0,6 L9,3 z"); mPath.setAttribute("fill", "#9ca3af");
-                        marker.appendChild(mPath); defs.appendChild(marker); svg.appendChild(defs);
-                        container.appendChild(svg);
-
-                        const rect = container.getBoundingClientRect();
-                        const centers = {{}};
-                        wordEls.forEach((el, i) => {{
-                            const r = el.getBoundingClientRect();
-                            centers[data[i].id] = {{ x: r.left + r.width/2 - rect.left, y: 300 }};
-                        }});
-
-                        let tdd = 0, n = 0;
-                        data.forEach(w => {{
-                            if (w.head === 0) {{
-                                const pos = centers[w.id];
-                                drawPath(svg, `M${{pos.x}},${{pos.y}} V${{pos.y - 70}}`, 'root-arc', w.id, 0);
-                                drawLabel(svg, pos.x, pos.y - 80, 'ROOT', w.id, 0);
-                                return;
-                            }}
-                            const s = centers[w.head], e = centers[w.id];
-                            const dist = Math.abs(w.head - w.id); tdd += dist; n++;
-                            const h = 40 + (dist * 14); const cpY = 300 - h * 1.3;
-                            drawPath(svg, `M${{s.x}},${{s.y}} C${{s.x}},${{cpY}} ${{e.x}},${{cpY}} ${{e.x}},${{e.y}}`, '', w.id, w.head);
-                            drawLabel(svg, (s.x + e.x)/2, 300 - h * 1.1, w.rel, w.id, w.head);
-                        }});
-
-                        renderDashboard(data, tdd, n);
-                    }}, 100);
-                }}
-
-                function drawPath(svg, d, cls, dep, head) {{
-                    const p = document.createElementNS("http://www.w3.org/2000/svg", "path");
-                    p.setAttribute("d", d); if(cls) p.setAttribute("class", cls);
-                    if(head!==0) p.setAttribute("marker-end", "url(#arrow)");
-                    p.dataset.h = head; p.dataset.d = dep;
-                    p.onmouseenter = () => highlightArc(head, dep); p.onmouseleave = clearH;
-                    svg.appendChild(p);
-                }}
-                function drawLabel(svg, x, y, txt, dep, head) {{
-                    const t = document.createElementNS("http://www.w3.org/2000/svg", "text");
-                    t.setAttribute("x", x); t.setAttribute("y", y); t.textContent = txt; t.className = 'dep-label';
-                    if(head!==0) {{ t.onmouseenter = () => highlightArc(head, dep); t.onmouseleave = clearH; }}
-                    svg.appendChild(t);
-                }}
-
-                function renderDashboard(data, tdd, n) {{
-                    const mdd = n ? (tdd/n).toFixed(2) : "0.00";
-                    const statsDiv = document.getElementById('stats-section');
-
-                    let html = `
-                    <div class="dashboard-grid">
-                        <div class="kpi-card"><span class="kpi-val">${{tdd}}</span><span class="kpi-label">Total Distance (TDD)</span></div>
-                        <div class="kpi-card"><span class="kpi-val">${{n}}</span><span class="kpi-label">Relations (n)</span></div>
-                        <div class="kpi-card"><span class="kpi-val" style="color:#2563eb">${{mdd}}</span><span class="kpi-label">Mean Distance (MDD)</span></div>
-                    </div>
-                    <div class="table-wrapper" style="margin-top: 24px;">
-                        <table>
-                            <thead><tr><th>Word</th><th>Pos Tag</th><th>Relation</th><th>Head</th><th>Distance</th><th>Out-Degree</th></tr></thead>
-                            <tbody>`;
-
-                    data.forEach(w => {{
-                        const hTxt = w.head===0 ? "ROOT" : data.find(x=>x.id===w.head).text;
-                        const dist = w.head===0 ? "-" : Math.abs(w.head-w.id);
-                        html += `<tr>
-                            <td style="font-weight:600; color:#111827;">${{w.text}}</td>
-                            <td><span class="pos-tag">${{w.pos}}</span></td>
-                            <td>${{w.rel}}</td>
-                            <td>${{hTxt}}</td>
-                            <td>${{dist}}</td>
-                            <td>${{w.out_degree}}</td>
-                        </tr>`;
-                    }});
-                    html += `</tbody></table></div>`;
-                    statsDiv.innerHTML = html;
-                }}
-
-                function highlight(id) {{
-                    document.body.classList.add('hover-mode'); document.getElementById('w-'+id).classList.add('highlighted');
-                    document.getElementById('pos-'+id).classList.add('highlighted');
-                    document.querySelectorAll('path').forEach(p => {{
-                        if(p.dataset.h==id || p.dataset.d==id) {{
-                            p.classList.add('highlighted');
-                            if(p.dataset.h!=0) {{
-                                document.getElementById('w-'+p.dataset.h).classList.add('highlighted');
-                                document.getElementById('pos-'+p.dataset.h).classList.add('highlighted');
-                            }}
-                            document.getElementById('w-'+p.dataset.d).classList.add('highlighted');
-                            document.getElementById('pos-'+p.dataset.d).classList.add('highlighted');
-                        }}
-                    }});
-                }}
-                function highlightArc(h, d) {{
-                    document.body.classList.add('hover-mode');
-                    const p = document.querySelector(`path[data-h="${{h}}"][data-d="${{d}}"]`); if(p) p.classList.add('highlighted');
-                    if(h!=0) {{
-                        document.getElementById('w-'+h).classList.add('highlighted');
-                        document.getElementById('pos-'+h).classList.add('highlighted');
-                    }}
-                    document.getElementById('w-'+d).classList.add('highlighted');
-                    document.getElementById('pos-'+d).classList.add('highlighted');
-                }}
-                function clearH() {{ document.body.classList.remove('hover-mode'); document.querySelectorAll('.highlighted').forEach(e => e.classList.remove('highlighted')); }}
-
-                render();
-            </script>
-        </body>
-        </html>
-        """
+    def get_html_template(self):
+        # 页面本体在 assets/index.html，样式和脚本由 syntaxlab:// 协议从 assets/ 提供
+        return web_assets.read_text(web_assets.PAGE)
 
 
 if __name__ == "__main__":
+    if '--trace-startup' in sys.argv:
+        sys.argv.remove('--trace-startup')
+        startup_trace.enable()
     # 启用高分屏支持，让界面在 Mac/高分屏 Windows 上更清晰
     QApplication.setHighDpiScaleFactorRoundingPolicy(Qt.HighDpiScaleFactorRoundingPolicy.PassThrough)
+    # QtWebEngine 延后到窗口显示后才导入，必须在创建 QApplication 前声明共享 GL 上下文
+    QApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
     app = QApplication(sys.argv)
+    startup_trace.mark("QApplication")
     window = MainWindow()
     window.show()
+    startup_trace.mark("window.show()")
     sys.exit(app.exec())
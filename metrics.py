@@ -0,0 +1,173 @@
+import numpy as np
+
+# ================= 依存指标 (NumPy 批量计算) =================
+# 所有句子拼成一条扁平数组一起算：
+#   heads   每个词的中心词编号(句内 1 起算，0 = ROOT)
+#   offsets 句子边界，第 k 句是 heads[offsets[k]:offsets[k+1]]
+# 仪表盘和批处理共用同一套实现。
+
+SENTENCE_FIELDS = ('length', 'relations', 'tdd', 'mdd', 'tree_depth', 'crossings', 'head_initial', 'head_final')
+
+# 两两比较弧是否交叉时，一次处理的 句数 x 词数^2 上限
+_CROSSING_BLOCK = 4_000_000
+
+
+def flatten(sentences):
+    lengths = np.fromiter((len(data) for data in sentences), dtype=np.int64, count=len(sentences))
+    offsets = np.zeros(len(sentences) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    heads = np.fromiter((w['head'] for data in sentences for w in data), dtype=np.int64, count=int(offsets[-1]))
+    return heads, offsets
+
+
+def _token_layout(heads, offsets):
+    lengths = np.diff(offsets)
+    sent = np.repeat(np.arange(len(lengths)), lengths)
+    ids = np.arange(len(heads)) - offsets[:-1][sent] + 1
+    # 越界的中心词当作无效弧处理
+    valid = (heads > 0) & (heads <= lengths[sent])
+    return lengths, sent, ids, valid
+
+
+def out_degree(heads, offsets):
+    _, sent, _, valid = _token_layout(heads, offsets)
+    target = offsets[:-1][sent[valid]] + heads[valid] - 1
+    return np.bincount(target, minlength=len(heads))
+
+
+def token_depth(heads, offsets, valid=None, sent=None):
+    # 指针跳跃：每轮把 "到祖先的步数" 翻倍合并，log2(句长) 轮即可到根；ROOT 的深度记为 1
+    if valid is None:
+        _, sent, _, valid = _token_layout(heads, offsets)
+    n = len(heads)
+    anc = np.arange(n)
+    anc[valid] = offsets[:-1][sent[valid]] + heads[valid] - 1
+    steps = valid.astype(np.int64)
+    for _ in range(64):
+        nxt = anc[anc]
+        if np.array_equal(nxt, anc):
+            break
+        steps = steps + steps[anc]
+        anc = nxt
+    return steps + 1
+
+
+def _crossing_blocks(heads, offsets, lengths, ids, valid):
+    # 弧 (l1, r1) 与 (l2, r2) 交叉当且仅当 l1 < l2 < r1 < r2；按句长分桶补齐成矩阵批量比较
+    # 逐块产出 (句子下标, 词的全局下标矩阵, 有效掩码, cross[b, i, j] = 第 i 条弧在左与第 j 条交叉)
+    if len(heads) == 0:
+        return
+    lo = np.where(valid, np.minimum(ids, heads), 0)
+    hi = np.where(valid, np.maximum(ids, heads), 0)
+    order = np.argsort(lengths, kind='stable')
+    start = 0
+    while start < len(order):
+        width = int(lengths[order[start]])
+        end = start + 1
+        while end < len(order):
+            width_next = int(lengths[order[end]])
+            if (end - start + 1) * width_next * width_next > _CROSSING_BLOCK:
+                break
+            width = width_next
+            end += 1
+        block = order[start:end]
+        start = end
+        if width < 4:
+            continue
+        cols = np.arange(width)
+        mask = cols[None, :] < lengths[block][:, None]
+        index = np.where(mask, offsets[block][:, None] + cols[None, :], 0)
+        L = np.where(mask, lo[index], 0)
+        R = np.where(mask, hi[index], 0)
+        live = mask & valid[index]
+        cross = ((L[:, :, None] < L[:, None, :]) & (L[:, None, :] < R[:, :, None]) & (R[:, :, None] < R[:, None, :])
+                 & live[:, :, None] & live[:, None, :])
+        yield block, index, mask, cross
+
+
+def _crossings(heads, offsets, lengths, ids, valid):
+    result = np.zeros(len(lengths), dtype=np.int64)
+    for block, _, _, cross in _crossing_blocks(heads, offsets, lengths, ids, valid):
+        result[block] = cross.sum(axis=(1, 2))
+    return result
+
+
+def crossing_arcs(heads, offsets, cancel=None):
+    # 逐词：该词到中心词的弧是否与同句其他弧交叉(非投射)；cancel 被置位时在块之间抛出 AnalysisCancelled
+    if cancel is not None:
+        from parsing import check_cancel
+    heads = np.asarray(heads, dtype=np.int64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    lengths, _, ids, valid = _token_layout(heads, offsets)
+    result = np.zeros(len(heads), dtype=bool)
+    for _, index, mask, cross in _crossing_blocks(heads, offsets, lengths, ids, valid):
+        if cancel is not None:
+            check_cancel(cancel)
+        hit = cross.any(axis=2) | cross.any(axis=1)
+        result[index[mask & hit]] = True
+    return result
+
+
+def compute_arrays(heads, offsets):
+    heads = np.asarray(heads, dtype=np.int64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    lengths, sent, ids, valid = _token_layout(heads, offsets)
+    S = len(lengths)
+
+    distance = np.where(valid, np.abs(heads - ids), 0)
+    relations = np.bincount(sent, weights=valid, minlength=S).astype(np.int64)
+    tdd = np.bincount(sent, weights=distance, minlength=S).astype(np.int64)
+    mdd = np.divide(tdd, relations, out=np.zeros(S), where=relations > 0)
+
+    depth = token_depth(heads, offsets, valid, sent)
+    tree_depth = np.zeros(S, dtype=np.int64)
+    np.maximum.at(tree_depth, sent, depth)
+
+    initial = np.bincount(sent, weights=valid & (heads < ids), minlength=S)
+    head_initial = np.divide(initial, relations, out=np.zeros(S), where=relations > 0)
+    head_final = np.where(relations > 0, 1.0 - head_initial, 0.0)
+
+    return {
+        # 逐词
+        'distance': distance,
+        'out_degree': out_degree(heads, offsets),
+        'depth': depth,
+        # 逐句
+        'length': lengths,
+        'relations': relations,
+        'tdd': tdd,
+        'mdd': mdd,
+        'tree_depth': tree_depth,
+        'crossings': _crossings(heads, offsets, lengths, ids, valid),
+        'head_initial': head_initial,
+        'head_final': head_final,
+    }
+
+
+def compute(sentences):
+    heads, offsets = flatten(sentences)
+    result = compute_arrays(heads, offsets)
+    result['offsets'] = offsets
+    return result
+
+
+def sentence_summary(result, k):
+    # 单句指标转成可直接 json.dumps 的 dict
+    summary = {}
+    for field in SENTENCE_FIELDS:
+        value = result[field][k].item()
+        summary[field] = round(value, 4) if isinstance(value, float) else value
+    return summary
+
+
+def fill_out_degree(sentences):
+    # 把批量算出的出度写回词记录
+    if not sentences:
+        return sentences
+    degrees = out_degree(*flatten(sentences)).tolist()
+    k = 0
+    for data in sentences:
+        for w in data:
+            w['out_degree'] = degrees[k]
+            k += 1
+    return sentences
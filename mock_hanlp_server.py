@@ -0,0 +1,144 @@
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ================= 本地 HanLP 替身服务 =================
+# 离线测试吞吐和故障处理用：返回确定性的 分词/词性/依存 结果，
+# 可以注入延迟、限流(429)和随机 503。
+# 用法: python mock_hanlp_server.py --port 8765 --latency 50 --rate-limit 20
+#       python batch.py corpus.txt -m hanlp --hanlp-url http://127.0.0.1:8765/api
+
+POS_CYCLE = ['NN', 'VV', 'NN', 'AD', 'PN', 'VV', 'NR', 'DEC']
+SENT_END = re.compile(r'(?<=[。！？!?；;])')
+
+
+def fake_sentence(sentence):
+    # 每两个字一个词；第一个动词做根，其余词都挂在它上面
+    tokens = [sentence[i:i + 2] for i in range(0, len(sentence), 2)]
+    pos = [POS_CYCLE[i % len(POS_CYCLE)] for i in range(len(tokens))]
+    root = min(1, len(tokens) - 1)
+    dep = [[0, 'root'] if i == root else [root + 1, 'nsubj' if i < root else 'dobj'] for i in range(len(tokens))]
+    return tokens, pos, dep
+
+
+def fake_parse(text):
+    if isinstance(text, list):
+        sentences = [s for s in text if s]
+    else:
+        sentences = [s for s in SENT_END.split(text or '') if s.strip()]
+    doc = {"tok/fine": [], "pos/ctb": [], "dep": []}
+    for sentence in sentences:
+        tokens, pos, dep = fake_sentence(sentence.strip())
+        doc["tok/fine"].append(tokens)
+        doc["pos/ctb"].append(pos)
+        doc["dep"].append(dep)
+    return doc
+
+
+class RateLimiter:
+    # 令牌桶；rate 为每秒允许的请求数
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class MockHanLPHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _reply(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        with server.lock:
+            server.requests += 1
+        if not self.path.rstrip('/').endswith('/parse'):
+            return self._reply(404, {"detail": f"Not Found: {self.path}"})
+        if server.limiter is not None and not server.limiter.allow():
+            with server.lock:
+                server.throttled += 1
+            return self._reply(429, {"detail": "Too Many Requests"}, {'Retry-After': str(server.retry_after)})
+        if server.fail_rate and server.random.random() < server.fail_rate:
+            with server.lock:
+                server.failed += 1
+            return self._reply(503, {"detail": "Service Unavailable"})
+        try:
+            form = json.loads(body)
+        except ValueError:
+            return self._reply(400, {"detail": "invalid JSON"})
+        if server.latency:
+            time.sleep(server.latency)
+        self._reply(200, fake_parse(form.get('text')))
+
+
+def start_server(host='127.0.0.1', port=0, latency=0.0, rate_limit=0, fail_rate=0.0,
+                 retry_after=0.2, seed=0, verbose=False):
+    # port=0 时由系统分配端口；返回的 server.url 可直接传给客户端
+    server = ThreadingHTTPServer((host, port), MockHanLPHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.limiter = RateLimiter(rate_limit) if rate_limit else None
+    server.fail_rate = fail_rate
+    server.retry_after = retry_after
+    server.random = random.Random(seed)
+    server.verbose = verbose
+    server.lock = threading.Lock()
+    server.requests = server.throttled = server.failed = 0
+    server.url = f"http://{host}:{server.server_address[1]}/api"
+    threading.Thread(target=server.serve_forever, name='mock-hanlp', daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本地 HanLP REST 替身服务")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0, help="每个请求的额外延迟(毫秒)")
+    parser.add_argument('--rate-limit', type=float, default=0, help="每秒允许的请求数，超出返回 429")
+    parser.add_argument('--fail-rate', type=float, default=0, help="随机返回 503 的比例 (0~1)")
+    parser.add_argument('--retry-after', type=float, default=0.2, help="429 响应里的 Retry-After(秒)")
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    server = start_server(args.host, args.port, args.latency / 1000, args.rate_limit, args.fail_rate,
+                          args.retry_after, verbose=args.verbose)
+    print(f"Mock HanLP 服务已启动: {server.url}", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(5)
+            print(f"请求 {server.requests} · 限流 {server.throttled} · 失败 {server.failed}", file=sys.stderr)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
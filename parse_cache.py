@@ -0,0 +1,157 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+
+# ================= 分析结果缓存 =================
+# 内存 LRU 在前，SQLite 磁盘缓存在后；按 (文本, 后端, 模型版本) 做内容寻址。
+
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.syntaxlab')
+# 结果结构或键的算法变化时递增，旧缓存自动失效
+CACHE_FORMAT = 3
+
+
+def normalize(text):
+    # 只合并同一字符的不同编码(NFC)；全角/半角、空白都原样保留，
+    # 否则缓存里的词和字符位置会对不上用户实际输入的文本
+    return unicodedata.normalize('NFC', text)
+
+
+def model_version(backend):
+    if backend == 'hanlp':
+        # 云端模型版本不可见，以服务地址区分(避免本地替身服务的结果混进来)
+        from pipelines import HANLP_URL
+        return f"hanlp-rest-{HANLP_URL}"
+    from importlib import metadata
+    try:
+        return f"{backend}-{metadata.version(backend)}"
+    except metadata.PackageNotFoundError:
+        return f"{backend}-unknown"
+
+
+class ParseCache:
+    def __init__(self, path=None, max_bytes=256 * 1024 * 1024, memory_entries=512):
+        self.path = path or os.path.join(CACHE_DIR, 'parse_cache.sqlite3')
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self._db = None
+        self._bytes = 0
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _conn(self):
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS parses ("
+                "key TEXT PRIMARY KEY, data BLOB NOT NULL, size INTEGER NOT NULL, atime REAL NOT NULL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS parses_atime ON parses(atime)")
+            self._bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM parses").fetchone()[0]
+        return self._db
+
+    def key(self, text, backend):
+        version = self._versions.get(backend)
+        if version is None:
+            version = self._versions[backend] = model_version(backend)
+        raw = f"{CACHE_FORMAT}\0{backend}\0{version}\0{normalize(text)}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _remember(self, key, data):
+        self._memory[key] = data
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, text, backend):
+        key = self.key(text, backend)
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                return data
+            try:
+                db = self._conn()
+                row = db.execute("SELECT data FROM parses WHERE key=?", (key,)).fetchone()
+                if row is not None:
+                    db.execute("UPDATE parses SET atime=? WHERE key=?", (time.time(), key))
+                    db.commit()
+            except sqlite3.Error:
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            data = json.loads(row[0])
+            self._remember(key, data)
+            self.hits += 1
+            return data
+
+    def put(self, text, backend, data):
+        if not data:
+            return
+        key = self.key(text, backend)
+        blob = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        with self._lock:
+            self._remember(key, data)
+            try:
+                db = self._conn()
+                old = db.execute("SELECT size FROM parses WHERE key=?", (key,)).fetchone()
+                db.execute("INSERT OR REPLACE INTO parses VALUES (?, ?, ?, ?)",
+                           (key, blob, len(blob), time.time()))
+                self._bytes += len(blob) - (old[0] if old else 0)
+                self._evict(db)
+                db.commit()
+            except sqlite3.Error:
+                pass
+
+    def _evict(self, db):
+        # 超出容量时按最近访问时间淘汰，一次清到上限的 90% 以摊薄开销
+        if self._bytes <= self.max_bytes:
+            return
+        target = self._bytes - int(self.max_bytes * 0.9)
+        freed = 0
+        doomed = []
+        for key, size in db.execute("SELECT key, size FROM parses ORDER BY atime"):
+            doomed.append((key,))
+            freed += size
+            if freed >= target:
+                break
+        db.executemany("DELETE FROM parses WHERE key=?", doomed)
+        self._bytes -= freed
+        for (key,) in doomed:
+            self._memory.pop(key, None)
+        self.evictions += len(doomed)
+
+    def stats(self):
+        with self._lock:
+            try:
+                count = self._conn().execute("SELECT COUNT(*) FROM parses").fetchone()[0]
+            except sqlite3.Error:
+                count = 0
+            return {"hits": self.hits, "memory_hits": self.memory_hits, "misses": self.misses,
+                    "evictions": self.evictions, "entries": count, "bytes": self._bytes}
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            try:
+                self._conn().execute("DELETE FROM parses")
+                self._db.commit()
+                self._bytes = 0
+            except sqlite3.Error:
+                pass
+
+
+cache = ParseCache()
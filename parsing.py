@@ -0,0 +1,117 @@
+import pipelines
+from timing import stage
+
+# ================= 句法分析核心 (不依赖 Qt) =================
+# GUI 的 AnalysisThread 和命令行批处理共用这里的逻辑。
+
+# 👇👇👇 你的 HanLP Key 填在这里 👇👇👇
+HANLP_KEY = "OTUxOUBiYnMuaGFubHAuY29tOk9OTFE1N0V6SlJUT3dwVXE="
+
+
+class AnalysisCancelled(Exception):
+    pass
+
+
+def check_cancel(cancel):
+    # cancel 是 threading.Event 之类的对象；在阶段之间检查，被取消就尽早退出
+    if cancel is not None and cancel.is_set():
+        raise AnalysisCancelled()
+
+
+def hanlp_auth(key):
+    return key if key and "粘贴" not in key else None
+
+
+def hanlp_client(hanlp_key=HANLP_KEY):
+    return pipelines.manager.get('hanlp', auth=hanlp_auth(hanlp_key))
+
+
+def hanlp_sentences(doc):
+    tokens = doc.get('tok/fine', doc.get('tok', []))
+    pos = doc.get('pos/ctb', doc.get('pos/pku', doc.get('pos', [])))
+    dep = doc.get('dep', [])
+
+    # 多句输入时每个字段都是 "句子 -> 词" 的二维列表；单句时统一包一层
+    if tokens and not isinstance(tokens[0], list): tokens = [tokens]
+    if pos and not isinstance(pos[0], list): pos = [pos]
+    if dep and dep[0] and not isinstance(dep[0][0], (list, tuple)): dep = [dep]
+
+    sentences = []
+    for k, sent_tokens in enumerate(tokens):
+        sent_pos = pos[k] if k < len(pos) else []
+        sent_dep = dep[k] if k < len(dep) else []
+        data = []
+        for i in range(len(sent_tokens)):
+            data.append(
+                {"id": i + 1, "text": sent_tokens[i], "pos": sent_pos[i] if i < len(sent_pos) else "X",
+                 "head": sent_dep[i][0], "rel": sent_dep[i][1], "out_degree": 0})
+        sentences.append(data)
+    return sentences
+
+
+def parse_hanlp(text, hanlp_key=HANLP_KEY, timer=None):
+    with stage(timer, 'hanlp.request'):
+        doc = hanlp_client(hanlp_key)(text, tasks='dep')
+    with stage(timer, 'hanlp.records'):
+        return hanlp_sentences(doc)
+
+
+def _run_stanza(nlp, text, timer, cancel):
+    if timer is None and cancel is None:
+        return nlp(text)
+    # 逐个处理器调用，以便分别计时、在处理器之间响应取消；Pipeline 接受已经部分处理过的 Document
+    doc = text
+    for name in list(nlp.processors):
+        check_cancel(cancel)
+        with stage(timer, f'stanza.{name}'):
+            doc = nlp(doc, processors=name)
+    return doc
+
+
+def parse_stanza(text, timer=None, cancel=None):
+    # 共享进程级 Pipeline，模型只在首次使用时加载(本地缺失才下载)
+    with stage(timer, 'stanza.load'):
+        pipelines.manager.get('stanza')
+    with pipelines.manager.use('stanza') as nlp:
+        doc = _run_stanza(nlp, text, timer, cancel)
+    with stage(timer, 'stanza.records'):
+        sentences = []
+        for sent in doc.sentences:
+            data = []
+            for word in sent.words:
+                data.append(
+                    {"id": word.id, "text": word.text, "pos": word.upos, "head": word.head, "rel": word.deprel,
+                     "out_degree": 0})
+            sentences.append(data)
+    return sentences
+
+
+def parse_text(text, model_name, hanlp_key=HANLP_KEY, timer=None, cancel=None):
+    # 返回整段文本的所有句子: [[词记录, ...], ...]；timer 为 timing.StageTimer 时记录各阶段耗时
+    # cancel 被置位后在下一个阶段边界抛出 AnalysisCancelled (已发出的 HanLP 请求无法中断)
+    backend = pipelines.backend_of(model_name)
+    sentences = []
+    check_cancel(cancel)
+    if backend == 'hanlp':
+        sentences = parse_hanlp(text, hanlp_key, timer)
+    elif backend == 'stanza':
+        sentences = parse_stanza(text, timer, cancel)
+    check_cancel(cancel)
+
+    # 计算出度 (NumPy 在用到时才导入，不拖慢 GUI 启动)
+    with stage(timer, 'out_degree'):
+        from metrics import fill_out_degree
+        return fill_out_degree([data for data in sentences if data])
+
+
+def parse_many(texts, model_name, hanlp_key=HANLP_KEY):
+    # 批量分析，返回与 texts 一一对应的句子列表
+    # HanLP 把列表里的每一项当作一句，整批打包发送；Stanza 逐条在本进程推理
+    if pipelines.backend_of(model_name) != 'hanlp':
+        return [parse_text(text, model_name, hanlp_key) for text in texts]
+    sentences = hanlp_sentences(hanlp_client(hanlp_key).parse_sentences(list(texts), tasks='dep'))
+    if len(sentences) != len(texts):
+        raise ValueError(f"HanLP 返回 {len(sentences)} 句，输入 {len(texts)} 句")
+    from metrics import fill_out_degree
+    fill_out_degree(sentences)
+    return [[data] if data else [] for data in sentences]
@@ -0,0 +1,145 @@
+import os
+import json
+import threading
+from contextlib import contextmanager
+
+import startup_trace
+
+# ================= 进程级模型管理 =================
+# 每种 后端/处理器 配置只加载一次，所有工作线程共享同一个实例。
+
+STANZA_LANG = 'zh'
+STANZA_PROCESSORS = 'tokenize,pos,lemma,depparse'
+HANLP_URL = 'https://www.hanlp.com/api'
+
+
+def backend_of(model_name):
+    # 下拉框文字 (或命令行里的 hanlp/stanza) -> 后端标识
+    name = model_name.lower()
+    if "hanlp" in name:
+        return 'hanlp'
+    if "stanza" in name:
+        return 'stanza'
+    return None
+
+
+def stanza_model_ready(lang, model_dir=None, processors=STANZA_PROCESSORS):
+    # 模型已在本地时跳过 stanza.download 的联网检查；语言目录在但缺处理器文件(下载中断)不算
+    from stanza.resources.common import DEFAULT_MODEL_DIR
+    model_dir = model_dir or DEFAULT_MODEL_DIR
+    try:
+        with open(os.path.join(model_dir, 'resources.json'), encoding='utf-8') as f:
+            resources = json.load(f)
+    except (OSError, ValueError):
+        return False
+    # 'zh' 在 resources.json 里是 'zh-hans' 的别名
+    lang = resources.get(lang, {}).get('alias', lang)
+    defaults = resources.get(lang, {}).get('default_processors', {})
+    for processor in processors.split(','):
+        folder = os.path.join(model_dir, lang, processor)
+        package = defaults.get(processor)
+        # 默认包名不是字符串(少数处理器是字典)时，至少要求目录里有模型文件
+        if isinstance(package, str):
+            if not os.path.isfile(os.path.join(folder, f"{package}.pt")):
+                return False
+        elif not os.path.isdir(folder) or not any(name.endswith('.pt') for name in os.listdir(folder)):
+            return False
+    return True
+
+
+def load_stanza(lang=STANZA_LANG, processors=STANZA_PROCESSORS):
+    # 导入 stanza 会连带导入 torch，是首次分析最慢的一步，分开计时
+    with startup_trace.span("import stanza"):
+        import stanza
+    if not stanza_model_ready(lang, processors=processors):
+        with startup_trace.span("download stanza model"):
+            stanza.download(lang, verbose=False)
+    with startup_trace.span("load stanza pipeline"):
+        try:
+            return stanza.Pipeline(lang, processors=processors, verbose=False, download_method=None)
+        except Exception:
+            # 本地检查漏掉的缺失(例如依赖的预训练词向量)：按默认方式补下载后再加载一次
+            return stanza.Pipeline(lang, processors=processors, verbose=False)
+
+
+def load_hanlp(url=HANLP_URL, auth=None, language='zh', **options):
+    # 长连接 + 批量 + 限流重试，接口与 hanlp_restful.HanLPClient 兼容
+    from hanlp_client import HanLPBatchClient
+    return HanLPBatchClient(url, auth=auth, language=language, **options)
+
+
+class _Entry:
+    def __init__(self):
+        self.obj = None
+        self.load_lock = threading.Lock()
+        self.run_lock = threading.Lock()
+
+
+class PipelineManager:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaders = {}
+        self._defaults = {}
+        self._entries = {}
+
+    def register(self, backend, loader, serialize=True):
+        # serialize=True: 推理阶段加锁，Stanza 的 Pipeline 不保证线程安全
+        self._loaders[backend] = (loader, serialize)
+
+    def configure(self, backend, **defaults):
+        # 设定某个后端的默认配置(例如 HanLP 服务地址)，之后的 get/use 都会带上
+        self._defaults[backend] = defaults
+
+    def _key(self, backend, config):
+        config = dict(self._defaults.get(backend, {}), **config)
+        return (backend,) + tuple(sorted(config.items()))
+
+    def _entry(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry()
+            return entry
+
+    def get(self, backend, **config):
+        loader, _ = self._loaders[backend]
+        config = dict(self._defaults.get(backend, {}), **config)
+        entry = self._entry(self._key(backend, config))
+        # 同一配置并发请求时只有一个线程真正加载，其余等待结果
+        with entry.load_lock:
+            if entry.obj is None:
+                entry.obj = loader(**config)
+        return entry.obj
+
+    @contextmanager
+    def use(self, backend, **config):
+        obj = self.get(backend, **config)
+        _, serialize = self._loaders[backend]
+        if not serialize:
+            yield obj
+            return
+        with self._entry(self._key(backend, config)).run_lock:
+            yield obj
+
+    def is_loaded(self, backend, **config):
+        with self._lock:
+            entry = self._entries.get(self._key(backend, config))
+        return entry is not None and entry.obj is not None
+
+    def warmup(self, backend, **config):
+        # 后台预热，失败时静默：真正分析时会再次加载并把错误报给界面
+        def _run():
+            try:
+                with startup_trace.span(f"warmup {backend}"):
+                    self.get(backend, **config)
+            except Exception:
+                pass
+
+        t = threading.Thread(target=_run, name=f"warmup-{backend}", daemon=True)
+        t.start()
+        return t
+
+
+manager = PipelineManager()
+manager.register('stanza', load_stanza)
+manager.register('hanlp', load_hanlp, serialize=False)
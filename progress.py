@@ -0,0 +1,27 @@
+import time
+
+# ================= 命令行进度汇报 =================
+# batch.py / export.py 共用：按间隔把已处理数、失败数和速度写到 stderr
+
+
+class Progress:
+    def __init__(self, stream, every):
+        self.stream = stream
+        self.every = every
+        self.start = self.last = time.perf_counter()
+        self.done = 0
+        self.failed = 0
+
+    def update(self, done, failed):
+        self.done += done
+        self.failed += failed
+        now = time.perf_counter()
+        if self.every and now - self.last >= self.every:
+            self.last = now
+            self.report(end="\r")
+
+    def report(self, end="\n"):
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        self.stream.write(f"已处理 {self.done} 句 · 失败 {self.failed} · "
+                          f"{self.done / elapsed:.1f} 句/秒 · {elapsed:.1f}s{end}")
+        self.stream.flush()
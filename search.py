@@ -0,0 +1,448 @@
+import os
+import re
+import sys
+import argparse
+import fnmatch
+
+import numpy as np
+
+import metrics
+from columnar import MAGIC, ColumnarWriter, ParseColumns
+from parsing import check_cancel
+
+# ================= 结构检索 =================
+# 在列式分析结果(columnar.ParseColumns)上建倒排索引，按一个小型模式语言找依存结构。
+# 每个词 = 它到中心词的那条弧；查询匹配的是词，结果按句返回匹配弧的编号。
+#
+# 查询语法:
+#   rel=nsubj  pos=VERB  dist>5  degree>=3  dir=left|right   条件(= != < <= > >=)；标签可用通配符 rel=nsubj*
+#   head.pos=VERB  head.rel=root                           中心词满足条件
+#   nonproj  root                                          非投射(与其他弧交叉)的弧 / 根节点
+#   has(...)  head(...)                                    有子节点满足 ... / 中心词满足 ...
+#   &  |  !  ( )                                           与、或、非、分组
+# 例: rel=nsubj & head.pos=VERB & dist>5
+#     pos=VERB & has(rel=obj & pos=NOUN) & !has(rel=nsubj)
+#     nonproj
+#
+# 索引: 关系、词性、中心词词性、(中心词词性, 词性) 组合、依存距离、非投射标记，
+# 各自是 "编码 -> 升序词下标" 的 CSR 结构；查询按句子对齐的块求值，结果边算边返回。
+# 转换树库、建索引、检索都接受 cancel(threading.Event)，被置位后在下一步之间抛出 AnalysisCancelled。
+
+MAX_DISTANCE = 64  # 距离索引的最大桶，更远的弧并入最后一桶再逐个比较
+BLOCK_SENTENCES = 20000
+LABEL_FIELDS = ('rel', 'pos')
+NUMBER_FIELDS = ('dist', 'degree')
+OPS = ('=', '!=', '<', '<=', '>', '>=')
+
+
+class QueryError(ValueError):
+    pass
+
+
+# ===== 查询解析 =====
+_TOKEN = re.compile(r'\s*(?:(\(|\)|&|\||!(?!=))|(<=|>=|!=|=|<|>)|([^\s()&|!=<>]+))')
+
+
+def _tokenize(text):
+    tokens, pos = [], 0
+    text = text.strip()
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if not m or m.end() == pos:
+            raise QueryError(f"无法解析: {text[pos:]}")
+        punct, op, word = m.groups()
+        tokens.append(('op', op) if op else ('punct', punct) if punct else ('word', word))
+        pos = m.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, text):
+        self.tokens = _tokenize(text)
+        self.i = 0
+
+    def peek(self, kind=None, value=None):
+        if self.i >= len(self.tokens):
+            return None
+        tok = self.tokens[self.i]
+        if (kind and tok[0] != kind) or (value and tok[1] != value):
+            return None
+        return tok
+
+    def take(self, kind, value=None):
+        tok = self.peek(kind, value)
+        if tok is None:
+            found = self.tokens[self.i][1] if self.i < len(self.tokens) else "结尾"
+            raise QueryError(f"期望 {value or kind}，遇到 {found}")
+        self.i += 1
+        return tok[1]
+
+    def parse(self):
+        node = self.expr()
+        if self.i < len(self.tokens):
+            raise QueryError(f"多余的内容: {self.tokens[self.i][1]}")
+        return node
+
+    def expr(self):
+        items = [self.conj()]
+        while self.peek('punct', '|'):
+            self.i += 1
+            items.append(self.conj())
+        return items[0] if len(items) == 1 else ('or', items)
+
+    def conj(self):
+        items = [self.unary()]
+        while self.peek('punct', '&'):
+            self.i += 1
+            items.append(self.unary())
+        return items[0] if len(items) == 1 else ('and', items)
+
+    def unary(self):
+        if self.peek('punct', '!'):
+            self.i += 1
+            return ('not', self.unary())
+        return self.atom()
+
+    def atom(self):
+        if self.peek('punct', '('):
+            self.i += 1
+            node = self.expr()
+            self.take('punct', ')')
+            return node
+        word = self.take('word')
+        if word in ('has', 'head') and self.peek('punct', '('):
+            self.i += 1
+            node = self.expr()
+            self.take('punct', ')')
+            return (word, node)
+        if word in ('nonproj', 'root'):
+            return (word,)
+        field = word
+        head = field.startswith('head.')
+        if head:
+            field = field[5:]
+        if field not in LABEL_FIELDS + NUMBER_FIELDS + ('dir',):
+            raise QueryError(f"未知字段: {word}")
+        op = self.take('op')
+        value = self.take('word')
+        if field in NUMBER_FIELDS:
+            try:
+                value = int(value)
+            except ValueError:
+                raise QueryError(f"{field} 需要整数: {value}")
+        elif op not in ('=', '!='):
+            raise QueryError(f"{field} 只支持 = 和 !=")
+        if field == 'dir' and value not in ('left', 'right'):
+            raise QueryError("dir 只能是 left 或 right")
+        cond = ('cond', field, op, value)
+        return ('head', cond) if head else cond
+
+
+def parse_query(text):
+    return _plan(_Parser(text).parse())
+
+
+def _is_glob(value):
+    return any(c in value for c in '*?[')
+
+
+def _plan(node):
+    # 同一个与式里的 pos=Y 和 head.pos=X 合并成一次组合索引查找
+    kind = node[0]
+    if kind in ('and', 'or'):
+        items = [_plan(item) for item in node[1]]
+        if kind == 'and':
+            dep = next((n for n in items if n[:3] == ('cond', 'pos', '=') and not _is_glob(n[3])), None)
+            head = next((n for n in items if n[0] == 'head' and n[1][:3] == ('cond', 'pos', '=')
+                         and not _is_glob(n[1][3])), None)
+            if dep and head:
+                items = [n for n in items if n is not dep and n is not head] + [('pair', head[1][3], dep[3])]
+        return items[0] if len(items) == 1 else (kind, items)
+    if kind in ('not', 'has', 'head'):
+        return (kind, _plan(node[1]))
+    return node
+
+
+# ===== 倒排索引 =====
+class Postings:
+    # codes[i] 是第 i 个词的编码；get(c) 返回编码为 c 的词下标(升序)
+    def __init__(self, codes, n_codes):
+        codes = np.asarray(codes, dtype=np.int64)
+        order = np.argsort(codes, kind='stable')
+        self.order = order.astype(np.int32) if len(codes) < 2 ** 31 else order
+        self.starts = np.zeros(n_codes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=n_codes)[:n_codes], out=self.starts[1:])
+
+    def get(self, code, lo=0, hi=None):
+        if code is None or not 0 <= code < len(self.starts) - 1:
+            return np.zeros(0, dtype=np.int64)
+        run = self.order[self.starts[code]:self.starts[code + 1]]
+        a = np.searchsorted(run, lo)
+        b = len(run) if hi is None else np.searchsorted(run, hi)
+        return run[a:b].astype(np.int64)
+
+    def union(self, codes, lo=0, hi=None):
+        parts = [self.get(code, lo, hi) for code in codes]
+        if not parts:
+            return np.zeros(0, dtype=np.int64)
+        return parts[0] if len(parts) == 1 else np.sort(np.concatenate(parts))
+
+
+def _compare(values, op, value):
+    return {'=': values == value, '!=': values != value, '<': values < value, '<=': values <= value,
+            '>': values > value, '>=': values >= value}[op]
+
+
+def _uses(node, kind):
+    if node[0] == kind:
+        return True
+    if node[0] in ('and', 'or'):
+        return any(_uses(n, kind) for n in node[1])
+    if node[0] in ('not', 'has', 'head'):
+        return _uses(node[1], kind)
+    return False
+
+
+class SearchIndex:
+    def __init__(self, cols, cancel=None):
+        self.cols = cols
+        heads = np.asarray(cols.heads, dtype=np.int64)
+        offsets = np.asarray(cols.offsets, dtype=np.int64)
+        lengths = np.diff(offsets)
+        sent = np.repeat(np.arange(len(lengths)), lengths)
+        ids = np.arange(len(heads)) - offsets[:-1][sent] + 1
+        valid = (heads > 0) & (heads <= lengths[sent])
+        self.offsets = offsets
+        self.heads = heads
+        # 中心词的全局下标，根节点和越界的中心词为 -1
+        self.head_index = np.where(valid, offsets[:-1][sent] + heads - 1, -1)
+        self.distance = np.where(valid, np.abs(heads - ids), 0)
+        self.direction = np.sign(ids - heads) * valid  # -1: 依存词在左, 1: 在右
+        check_cancel(cancel)
+
+        pos = np.asarray(cols.pos, dtype=np.int64)
+        n_pos = len(cols.pos_vocab.labels) + 1  # 最后一个编码留给根节点的 "中心词"
+        head_pos = np.where(valid, pos[np.maximum(self.head_index, 0)], n_pos - 1)
+        self.rel = Postings(cols.rel, len(cols.rel_vocab.labels))
+        self.pos = Postings(pos, n_pos)
+        self.head_pos = Postings(head_pos, n_pos)
+        check_cancel(cancel)
+        self.n_pos = n_pos
+        self.pair = Postings(head_pos * n_pos + pos, n_pos * n_pos)
+        check_cancel(cancel)
+        # 根节点和越界的中心词没有弧，单独放在 MAX_DISTANCE + 1 桶里，距离条件不会匹配到
+        self.dist = Postings(np.where(valid, np.minimum(self.distance, MAX_DISTANCE), MAX_DISTANCE + 1),
+                             MAX_DISTANCE + 2)
+        self._nonproj = None
+
+    def build_nonproj(self, cancel=None):
+        # 交叉弧要两两比较，第一次用到时才算；中途取消时什么也不留下
+        if self._nonproj is None:
+            self._nonproj = Postings(metrics.crossing_arcs(self.heads, self.offsets, cancel), 2)
+        return self._nonproj
+
+    @property
+    def nonproj(self):
+        return self.build_nonproj()
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    # ===== 求值 =====
+    def _label_codes(self, field, op, value):
+        vocab = self.cols.rel_vocab if field == 'rel' else self.cols.pos_vocab
+        if _is_glob(value):
+            hit = {i for i, label in enumerate(vocab.labels) if fnmatch.fnmatchcase(label, value)}
+        else:
+            code = vocab.get(value)
+            hit = set() if code is None else {code}
+        if op == '!=':
+            hit = set(range(len(vocab.labels))) - hit
+        return sorted(hit)
+
+    def _eval(self, node, lo, hi, memo):
+        key = id(node)
+        if key not in memo:
+            memo[key] = self._compute(node, lo, hi, memo)
+        return memo[key]
+
+    def _compute(self, node, lo, hi, memo):
+        kind = node[0]
+        if kind == 'and':
+            parts = sorted((self._eval(n, lo, hi, memo) for n in node[1]), key=len)
+            result = parts[0]
+            for part in parts[1:]:
+                if not len(result):
+                    break
+                result = np.intersect1d(result, part, assume_unique=True)
+            return result
+        if kind == 'or':
+            result = self._eval(node[1][0], lo, hi, memo)
+            for n in node[1][1:]:
+                result = np.union1d(result, self._eval(n, lo, hi, memo))
+            return result
+        if kind == 'not':
+            return np.setdiff1d(np.arange(lo, hi), self._eval(node[1], lo, hi, memo), assume_unique=True)
+        if kind == 'has':
+            heads = self.head_index[self._eval(node[1], lo, hi, memo)]
+            return np.unique(heads[heads >= 0])
+        if kind == 'head':
+            inner = node[1]
+            if inner[:2] == ('cond', 'pos') and inner[2] in ('=', '!='):
+                return self.head_pos.union(self._label_codes('pos', inner[2], inner[3]), lo, hi)
+            heads = self._eval(inner, lo, hi, memo)
+            return lo + np.flatnonzero(np.isin(self.head_index[lo:hi], heads))
+        if kind == 'pair':
+            head = self.cols.pos_vocab.get(node[1])
+            dep = self.cols.pos_vocab.get(node[2])
+            if head is None or dep is None:
+                return np.zeros(0, dtype=np.int64)
+            return self.pair.get(head * self.n_pos + dep, lo, hi)
+        if kind == 'nonproj':
+            return self.nonproj.get(1, lo, hi)
+        if kind == 'root':
+            return lo + np.flatnonzero(self.heads[lo:hi] == 0)
+        _, field, op, value = node
+        if field in LABEL_FIELDS:
+            index = self.rel if field == 'rel' else self.pos
+            return index.union(self._label_codes(field, op, value), lo, hi)
+        if field == 'dist':
+            codes = [d for d in range(MAX_DISTANCE + 1) if _compare(d, op, value) or d == MAX_DISTANCE]
+            result = self.dist.union(codes, lo, hi)
+            # 最后一桶里的距离各不相同，逐个复核
+            far = self.distance[result] >= MAX_DISTANCE
+            if far.any():
+                keep = ~far | _compare(self.distance[result], op, value)
+                result = result[keep]
+            return result
+        if field == 'degree':
+            return lo + np.flatnonzero(_compare(np.asarray(self.cols.out_degree[lo:hi]), op, value))
+        want = -1 if value == 'left' else 1
+        return lo + np.flatnonzero(_compare(self.direction[lo:hi], op, want))
+
+    def _witness(self, node, targets, lo, hi, memo, marks):
+        # 收集 has(...) 实际用到的子节点弧，和匹配的弧一起高亮
+        kind = node[0]
+        if kind in ('and', 'or'):
+            for n in node[1]:
+                self._witness(n, targets, lo, hi, memo, marks)
+        elif kind == 'has':
+            children = self._eval(node[1], lo, hi, memo)
+            children = children[np.isin(self.head_index[children], targets)]
+            marks.append(children)
+            self._witness(node[1], children, lo, hi, memo, marks)
+        elif kind == 'head':
+            heads = self.head_index[targets]
+            self._witness(node[1], np.unique(heads[heads >= 0]), lo, hi, memo, marks)
+
+    def search(self, query, block=BLOCK_SENTENCES, cancel=None):
+        # 逐块产出 (句子下标, 匹配的词编号列表, 需要高亮的词编号列表)，词编号句内从 1 起
+        node = parse_query(query) if isinstance(query, str) else query
+        if _uses(node, 'nonproj'):
+            self.build_nonproj(cancel)
+        for first in range(0, len(self), block):
+            check_cancel(cancel)
+            last = min(len(self), first + block)
+            lo, hi = int(self.offsets[first]), int(self.offsets[last])
+            memo = {}
+            hits = self._eval(node, lo, hi, memo)
+            if not len(hits):
+                continue
+            marks = [hits]
+            self._witness(node, hits, lo, hi, memo, marks)
+            marks = np.unique(np.concatenate(marks))
+            for k, matched, marked in zip(*_group(self.offsets, hits, marks, first, last)):
+                yield k, matched, marked
+
+    def count(self, query):
+        hits = sentences = 0
+        for _, matched, _ in self.search(query):
+            sentences += 1
+            hits += len(matched)
+        return hits, sentences
+
+
+def _group(offsets, hits, marks, first, last):
+    # 把全局词下标按句分组，转成句内编号
+    bounds = offsets[first:last + 1]
+    hit_sent = np.searchsorted(bounds, hits, side='right') - 1
+    mark_sent = np.searchsorted(bounds, marks, side='right') - 1
+    sentences = np.unique(hit_sent)
+    hit_cut = np.searchsorted(hit_sent, sentences, side='left').tolist() + [len(hits)]
+    mark_a = np.searchsorted(mark_sent, sentences, side='left')
+    mark_b = np.searchsorted(mark_sent, sentences, side='right')
+    matched, marked = [], []
+    for j, s in enumerate(sentences.tolist()):
+        base = int(bounds[s]) - 1
+        matched.append((hits[hit_cut[j]:hit_cut[j + 1]] - base).tolist())
+        marked.append((marks[mark_a[j]:mark_b[j]] - base).tolist())
+    return (sentences + first).tolist(), matched, marked
+
+
+# ===== 语料 =====
+COLUMNS_SUFFIX = '.cols'
+
+
+def _columns_from_treebank(path, cache, cancel=None):
+    from treebank import Treebank
+    os.makedirs(os.path.dirname(os.path.abspath(cache)), exist_ok=True)
+    with Treebank(path) as tb, ColumnarWriter(cache) as writer:
+        for start in range(0, len(tb), 5000):
+            check_cancel(cancel)
+            # 空句也要写进去，保证句号与树库一致
+            writer.append(metrics.fill_out_degree([tb.sentence(k)[0]
+                                                   for k in range(start, min(len(tb), start + 5000))]))
+
+
+def open_corpus(path, cancel=None):
+    # 列式结果文件直接映射；CoNLL-U 树库先转成列式缓存(位置同树库索引，树库更新后重建)，句号与树库一致
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) == MAGIC:
+            return ParseColumns.load(path)
+    from treebank import cache_paths
+    candidates = cache_paths(path, COLUMNS_SUFFIX)
+    for cache in candidates:
+        if os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(path):
+            return ParseColumns.load(cache)
+    error = None
+    for cache in candidates:
+        try:
+            _columns_from_treebank(path, cache, cancel)
+        except OSError as e:
+            error = e
+            continue
+        return ParseColumns.load(cache)
+    raise error
+
+
+# ===== 命令行 =====
+def main(argv=None):
+    from conllu import format_sentence
+    ap = argparse.ArgumentParser(description="在分析结果(列式文件或 CoNLL-U 树库)里检索依存结构")
+    ap.add_argument("corpus", help="batch.py -f columnar 的输出，或 .conllu 树库")
+    ap.add_argument("query", help="例: 'rel=nsubj & head.pos=VERB & dist>5'")
+    ap.add_argument("-n", "--limit", type=int, default=20, help="最多输出多少句 (0 = 只计数)")
+    ap.add_argument("--count", action="store_true", help="只输出命中数")
+    args = ap.parse_args(argv)
+
+    try:
+        node = parse_query(args.query)
+    except QueryError as e:
+        ap.error(str(e))
+    index = SearchIndex(open_corpus(args.corpus))
+    if args.count or args.limit == 0:
+        hits, sentences = index.count(node)
+        print(f"{hits} 处 / {sentences} 句")
+        return 0
+    shown = 0
+    for k, matched, _ in index.search(node):
+        sys.stdout.write(format_sentence(index.cols.sentence(k), sent_id=k + 1,
+                                         comments={"match": " ".join(map(str, matched))}))
+        shown += 1
+        if shown >= args.limit:
+            break
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
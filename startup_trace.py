@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+import threading
+from contextlib import contextmanager
+
+# ================= 启动耗时追踪 =================
+# 默认关闭；设置环境变量 SYNTAXLAB_TRACE=1 或带 --trace-startup 启动时，
+# 记录每个阶段相对进程启动(本模块被导入)的时间，窗口可用和首次分析完成时各打印一次分解表。
+
+T0 = time.perf_counter()
+enabled = bool(os.environ.get('SYNTAXLAB_TRACE'))
+
+_lock = threading.Lock()
+_marks = []
+_seen = set()
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def _record(phase, at, duration):
+    with _lock:
+        _marks.append((at, phase, duration, threading.current_thread().name))
+
+
+def mark(phase, once=False):
+    # once=True: 同名阶段只记第一次(例如 "首次分析")
+    if not enabled:
+        return False
+    with _lock:
+        if once and phase in _seen:
+            return False
+        _seen.add(phase)
+    _record(phase, time.perf_counter() - T0, None)
+    return True
+
+
+def seen(phase):
+    with _lock:
+        return phase in _seen
+
+
+@contextmanager
+def span(phase):
+    if not enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        _record(phase, end - T0, end - start)
+
+
+def report(title, stream=None):
+    if not enabled:
+        return
+    stream = stream or sys.stderr
+    with _lock:
+        marks = sorted(_marks)
+    stream.write(f"===== {title} =====\n")
+    last = {}
+    for at, phase, duration, thread in marks:
+        # 计时段显示自身耗时，单点显示与同一线程上一阶段的间隔
+        cost = duration if duration is not None else at - last.get(thread, 0.0)
+        last[thread] = at
+        where = "" if thread == 'MainThread' else f"  [{thread}]"
+        stream.write(f"{at * 1000:9.1f}ms  +{cost * 1000:8.1f}ms  {phase}{where}\n")
+    stream.flush()
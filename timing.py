@@ -0,0 +1,91 @@
+import os
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+from hanlp_client import LatencyStats
+
+# ================= 分阶段计时 =================
+# 一次分析拆成若干阶段(HanLP 网络请求、Stanza 各处理器、出度、缓存、整形、渲染)，
+# 结束时发出一条结构化事件：写入 logging，另可追加到 JSONL 文件；同时累计各阶段的滚动分位数。
+# JSONL 路径: 环境变量 SYNTAXLAB_TIMING_LOG，或 TimingLog(path=...)
+
+logger = logging.getLogger('syntaxlab.timing')
+
+
+class StageTimer:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = []
+        self.info = {}
+
+    @contextmanager
+    def stage(self, name):
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - begin)
+
+    def add(self, name, seconds):
+        self.stages.append((name, seconds))
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def as_dict(self):
+        # 同名阶段(例如多批请求)累加
+        merged = {}
+        for name, seconds in self.stages:
+            merged[name] = merged.get(name, 0.0) + seconds
+        return merged
+
+
+@contextmanager
+def stage(timer, name):
+    # timer 可以为 None：调用方不关心计时时不必处处判断
+    if timer is None:
+        yield
+    else:
+        with timer.stage(name):
+            yield
+
+
+class TimingLog:
+    def __init__(self, path=None, window=200):
+        self.path = path if path is not None else os.environ.get('SYNTAXLAB_TIMING_LOG')
+        self.window = window
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.last = None
+
+    def record(self, timer, total=None, **info):
+        stages = timer.as_dict()
+        total = timer.elapsed() if total is None else total
+        event = {"event": "analysis", "ts": round(time.time(), 3), **timer.info, **info,
+                 "total_ms": round(total * 1000, 2),
+                 "stages": {name: round(seconds * 1000, 2) for name, seconds in stages.items()}}
+        with self._lock:
+            for name, seconds in list(stages.items()) + [("total", total)]:
+                stats = self._stats.get(name)
+                if stats is None:
+                    stats = self._stats[name] = LatencyStats(self.window)
+                stats.add(seconds)
+            self.last = event
+            if self.path:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        logger.info(json.dumps(event, ensure_ascii=False))
+        return event
+
+    def rolling(self):
+        # {阶段: {count, p50, p95}}，单位毫秒
+        with self._lock:
+            items = list(self._stats.items())
+        return {name: {"count": stats.count, "p50": round(stats.percentile(50) * 1000, 2),
+                       "p95": round(stats.percentile(95) * 1000, 2)} for name, stats in items}
+
+
+timing_log = TimingLog()
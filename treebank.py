@@ -0,0 +1,141 @@
+import os
+import hashlib
+
+import numpy as np
+
+from conllu import parse_sentence
+from parse_cache import CACHE_DIR
+
+# ================= CoNLL-U 树库随机访问 =================
+# 文件整体做内存映射，不读入内存；第一次打开时扫描一遍句子边界(空行)，
+# 把每句的 [起始字节, 结束字节) 存成索引文件，之后打开直接映射索引，第 N 句 = 一次切片 + 解析。
+# 索引第 0 行记录树库的 [字节数, 修改时间]，对不上就重建。
+# 索引默认放在树库旁边 (xxx.conllu.idx.npy)，目录不可写时放到 ~/.syntaxlab/treebanks/
+
+BLOCK = 16 * 1024 * 1024
+INDEX_SUFFIX = '.idx.npy'
+
+
+def build_index(buf, block=BLOCK):
+    # buf: uint8 数组(通常是 np.memmap)；按块找换行，空行(或只有 \r)分隔句子
+    starts, ends = [], []
+    n = len(buf)
+    line_start = 0
+    prev_blank = True
+    for base in range(0, n, block):
+        nl = np.flatnonzero(buf[base:base + block] == 10) + base
+        if not len(nl):
+            continue
+        line_starts = np.concatenate(([line_start], nl[:-1] + 1))
+        length = nl - line_starts
+        blank = length == 0
+        one = np.flatnonzero(length == 1)
+        blank[one] = buf[line_starts[one]] == 13
+        before = np.concatenate(([prev_blank], blank[:-1]))
+        starts.append(line_starts[~blank & before])
+        ends.append(line_starts[blank & ~before])
+        line_start = int(nl[-1]) + 1
+        prev_blank = bool(blank[-1])
+    # 最后一行没有换行符
+    if line_start < n:
+        if prev_blank:
+            starts.append(np.array([line_start]))
+        prev_blank = False
+    if not prev_blank:
+        ends.append(np.array([n]))
+    if not starts:
+        return np.zeros((0, 2), dtype=np.int64)
+    return np.stack([np.concatenate(starts), np.concatenate(ends)], axis=1).astype(np.int64)
+
+
+def index_path(path):
+    return path + INDEX_SUFFIX
+
+
+def cache_paths(path, suffix):
+    # 派生文件(索引、列式缓存)的候选位置：先放树库旁边，再放 ~/.syntaxlab/treebanks/
+    digest = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:16]
+    return [path + suffix, os.path.join(CACHE_DIR, 'treebanks', digest + suffix)]
+
+
+def _signature(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _load_index(path, signature):
+    try:
+        index = np.load(path, mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    if index.ndim != 2 or index.shape[1] != 2 or index.dtype != np.int64 or index[0].tolist() != signature:
+        return None
+    return index[1:]
+
+
+def _save_index(path, spans, signature):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        np.save(f, np.concatenate([np.array([signature], dtype=np.int64), spans]))
+    os.replace(tmp, path)
+
+
+class Treebank:
+    def __init__(self, path, index=None, rebuild=False):
+        self.path = path
+        signature = _signature(path)
+        self.buf = np.memmap(path, dtype=np.uint8, mode='r') if signature[0] else np.zeros(0, dtype=np.uint8)
+        candidates = [index] if index else cache_paths(path, INDEX_SUFFIX)
+        self.spans = None
+        if not rebuild:
+            for candidate in candidates:
+                self.spans = _load_index(candidate, signature)
+                if self.spans is not None:
+                    self.index_path = candidate
+                    break
+        if self.spans is None:
+            spans = build_index(self.buf)
+            self.index_path = None
+            for candidate in candidates:
+                try:
+                    _save_index(candidate, spans, signature)
+                except OSError:
+                    continue
+                self.index_path = candidate
+                break
+            # 索引哪里都写不进去时只在本次使用
+            self.spans = spans
+
+    def __len__(self):
+        return len(self.spans)
+
+    def block(self, k):
+        a, b = self.spans[k]
+        return self.buf[a:b].tobytes().decode('utf-8', errors='replace')
+
+    def sentence(self, k):
+        # 返回 (词记录列表, 注释)
+        if k < 0:
+            k += len(self)
+        if not 0 <= k < len(self):
+            raise IndexError(f"树库只有 {len(self)} 句: {k}")
+        return parse_sentence(self.block(k))
+
+    def page(self, start, count):
+        # 第 start 句起的 count 句，已填好出度，可直接交给界面渲染
+        # 空句不渲染，所以同时返回每句的句号(从 1 起)，编号不会因为跳过空句而错位
+        from metrics import fill_out_degree
+        stop = min(len(self), max(0, start) + count)
+        pairs = [(k + 1, self.sentence(k)[0]) for k in range(max(0, start), stop)]
+        pairs = [(number, data) for number, data in pairs if data]
+        return [number for number, _ in pairs], fill_out_degree([data for _, data in pairs])
+
+    def close(self):
+        self.buf = self.spans = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
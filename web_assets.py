@@ -0,0 +1,101 @@
+import os
+import sys
+import mimetypes
+import threading
+
+# ================= 本地网页资源 =================
+# 页面用到的 HTML/CSS/JS 都放在 assets/ 目录，随程序一起打包；
+# 通过自定义协议 syntaxlab://app/ 提供给 QWebEngineView，渲染过程从不访问网络。
+# 读文件的部分不依赖 QtWebEngine；协议注册和处理器在 WebEngine 初始化时才导入。
+
+SCHEME = b'syntaxlab'
+HOST = 'app'
+PAGE = 'index.html'
+# 资源随程序发布、不会在运行期间变化
+CACHE_CONTROL = b'public, max-age=31536000, immutable'
+
+MIME_TYPES = {'.html': 'text/html; charset=utf-8', '.css': 'text/css; charset=utf-8',
+              '.js': 'text/javascript; charset=utf-8', '.woff2': 'font/woff2', '.woff': 'font/woff',
+              '.ttf': 'font/ttf', '.otf': 'font/otf', '.svg': 'image/svg+xml', '.png': 'image/png'}
+
+
+def asset_dir():
+    # PyInstaller 单文件模式下资源被解压到 sys._MEIPASS
+    base = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base, 'assets')
+
+
+_lock = threading.Lock()
+_cache = {}
+
+
+def read_asset(name):
+    # 返回 (bytes, mime)，不存在或越出 assets 目录时返回 None；读过的文件常驻内存
+    with _lock:
+        if name in _cache:
+            return _cache[name]
+    root = asset_dir()
+    path = os.path.normpath(os.path.join(root, name))
+    if not path.startswith(root + os.sep) or not os.path.isfile(path):
+        return None
+    with open(path, 'rb') as f:
+        data = f.read()
+    ext = os.path.splitext(path)[1].lower()
+    entry = (data, MIME_TYPES.get(ext) or mimetypes.guess_type(path)[0] or 'application/octet-stream')
+    with _lock:
+        _cache[name] = entry
+    return entry
+
+
+def read_text(name):
+    entry = read_asset(name)
+    if entry is None:
+        raise FileNotFoundError(os.path.join(asset_dir(), name))
+    return entry[0].decode('utf-8')
+
+
+def page_url(name=PAGE):
+    from PySide6.QtCore import QUrl
+    return QUrl(f"{SCHEME.decode()}://{HOST}/{name}")
+
+
+def register_scheme():
+    # 必须在创建任何 QtWebEngine 对象之前调用
+    from PySide6.QtWebEngineCore import QWebEngineUrlScheme
+    if QWebEngineUrlScheme.schemeByName(SCHEME).name():
+        return
+    scheme = QWebEngineUrlScheme(SCHEME)
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Host)
+    scheme.setFlags(QWebEngineUrlScheme.Flag.SecureScheme | QWebEngineUrlScheme.Flag.LocalScheme
+                    | QWebEngineUrlScheme.Flag.LocalAccessAllowed | QWebEngineUrlScheme.Flag.CorsEnabled)
+    QWebEngineUrlScheme.registerScheme(scheme)
+
+
+_handlers = {}
+
+
+def install(profile):
+    # 给 profile 装上 syntaxlab:// 的处理器；处理器对象需要一直持有引用
+    from PySide6.QtCore import QBuffer, QByteArray, QIODevice
+    from PySide6.QtWebEngineCore import QWebEngineUrlRequestJob, QWebEngineUrlSchemeHandler
+
+    class AssetSchemeHandler(QWebEngineUrlSchemeHandler):
+        def requestStarted(self, job):
+            url = job.requestUrl()
+            entry = read_asset(url.path().lstrip('/') or PAGE) if url.host() == HOST else None
+            if entry is None:
+                # 缺失的资源(例如没有打包字体)立即 404，页面退回系统字体
+                job.fail(QWebEngineUrlRequestJob.Error.UrlNotFound)
+                return
+            data, mime = entry
+            buf = QBuffer(job)
+            buf.setData(data)
+            buf.open(QIODevice.ReadOnly)
+            job.setAdditionalResponseHeaders({QByteArray(b'Cache-Control'): QByteArray(CACHE_CONTROL)})
+            job.reply(mime.encode(), buf)
+
+    key = id(profile)
+    if key not in _handlers:
+        handler = _handlers[key] = AssetSchemeHandler(profile)
+        profile.installUrlSchemeHandler(SCHEME, handler)
+    return _handlers[key]